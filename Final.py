@@ -1,956 +1,3375 @@
-import pygame
-from pygame.locals import *
-from OpenGL.GL import *
-from OpenGL.GLU import *
-import math
-import random
-import numpy as np
-
-# Konstanta
-WIDTH, HEIGHT = 1400, 900
-FPS = 60
-
-# Fungsi helper untuk menggambar sphere tanpa GLUT
-def draw_sphere(radius, slices=20, stacks=20):
-    quadric = gluNewQuadric()
-    gluSphere(quadric, radius, slices, stacks)
-    gluDeleteQuadric(quadric)
-
-# Fungsi helper untuk menggambar cube
-def draw_cube(size=1.0):
-    s = size / 2.0
-    vertices = [
-        [-s, -s, -s], [s, -s, -s], [s, s, -s], [-s, s, -s],  # Back
-        [-s, -s, s], [s, -s, s], [s, s, s], [-s, s, s]       # Front
-    ]
-    
-    faces = [
-        [0, 1, 2, 3], [4, 5, 6, 7], [0, 1, 5, 4],
-        [2, 3, 7, 6], [0, 3, 7, 4], [1, 2, 6, 5]
-    ]
-    
-    normals = [
-        [0, 0, -1], [0, 0, 1], [0, -1, 0],
-        [0, 1, 0], [-1, 0, 0], [1, 0, 0]
-    ]
-    
-    glBegin(GL_QUADS)
-    for i, face in enumerate(faces):
-        glNormal3fv(normals[i])
-        for vertex in face:
-            glVertex3fv(vertices[vertex])
-    glEnd()
-
-# Class untuk partikel CO2
-class CO2Particle:
-    def __init__(self, x, y, z):
-        self.pos = [x, y, z]
-        self.velocity = [random.uniform(-0.03, 0.03), random.uniform(0.01, 0.04), random.uniform(-0.03, 0.03)]
-        self.size = random.uniform(0.06, 0.12)
-        self.lifetime = random.uniform(4, 8)
-        self.age = 0
-        self.float_offset = random.uniform(0, 2 * math.pi)
-        
-    def update(self, dt, time):
-        self.age += dt
-        
-        # Float movement
-        self.pos[0] += self.velocity[0] + math.sin(time + self.float_offset) * 0.01
-        self.pos[1] += self.velocity[1] * 0.3
-        self.pos[2] += self.velocity[2] + math.cos(time + self.float_offset) * 0.01
-        
-        # Boundary check
-        if self.pos[1] > 4:
-            self.pos[1] = -2
-        if abs(self.pos[0]) > 6:
-            self.velocity[0] *= -1
-        if abs(self.pos[2]) > 6:
-            self.velocity[2] *= -1
-                
-        return self.age < self.lifetime
-    
-    def draw(self):
-        glPushMatrix()
-        glTranslatef(*self.pos)
-        
-        # Glow effect
-        glColor4f(0.3, 0.5, 0.9, 0.25)
-        draw_sphere(self.size * 1.8, 10, 10)
-        
-        # Main particle
-        glColor4f(0.4, 0.65, 1.0, 0.8)
-        draw_sphere(self.size, 10, 10)
-        glPopMatrix()
-
-# Class untuk Tree
-class Tree:
-    def __init__(self, x, y, z):
-        self.pos = [x, y, z]
-        self.sway = 0
-        self.absorbing = False
-        self.absorb_timer = 0
-        self.growth = 1.0
-        
-    def update(self, dt, time):
-        self.sway = math.sin(time * 2 + self.pos[0]) * 0.08
-        self.absorb_timer -= dt
-        if self.absorb_timer <= 0:
-            self.absorbing = False
-        
-        # Gentle breathing animation
-        self.growth = 1.0 + math.sin(time * 1.5 + self.pos[0]) * 0.05
-    
-    def absorb_co2(self):
-        self.absorbing = True
-        self.absorb_timer = 1.2
-        
-    def draw(self):
-        glPushMatrix()
-        glTranslatef(*self.pos)
-        glRotatef(self.sway * 8, 0, 0, 1)
-        
-        # Trunk
-        glColor3f(0.45, 0.30, 0.15)
-        glPushMatrix()
-        glTranslatef(0, -0.3, 0)
-        glScalef(0.18, 0.7, 0.18)
-        draw_cube(1.0)
-        glPopMatrix()
-        
-        # Leaves - main
-        scale = self.growth
-        if self.absorbing:
-            glColor3f(0.1, 1.0, 0.4)  # Bright green when absorbing
-        else:
-            glColor3f(0.15, 0.60, 0.20)
-        
-        glPushMatrix()
-        glTranslatef(0, 0.35, 0)
-        glScalef(scale, scale, scale)
-        draw_sphere(0.55, 16, 16)
-        glPopMatrix()
-        
-        # Side leaves
-        glColor3f(0.25, 0.75, 0.30)
-        glPushMatrix()
-        glTranslatef(-0.35, 0.20, 0)
-        glScalef(scale, scale, scale)
-        draw_sphere(0.38, 14, 14)
-        glPopMatrix()
-        
-        glPushMatrix()
-        glTranslatef(0.35, 0.20, 0)
-        glScalef(scale, scale, scale)
-        draw_sphere(0.38, 14, 14)
-        glPopMatrix()
-        
-        # Glow effect when absorbing
-        if self.absorbing:
-            glColor4f(0.2, 1.0, 0.3, 0.4)
-            glPushMatrix()
-            glTranslatef(0, 0.35, 0)
-            draw_sphere(0.75, 16, 16)
-            glPopMatrix()
-        
-        glPopMatrix()
-
-# Class untuk Factory
-class Factory:
-    def __init__(self, x, y, z):
-        self.pos = [x, y, z]
-        self.smoke_timer = 0
-        self.smoke_particles = []
-        
-    def update(self, dt):
-        self.smoke_timer += dt
-        
-        # Update smoke particles
-        self.smoke_particles = [s for s in self.smoke_particles if s['life'] > 0]
-        for smoke in self.smoke_particles:
-            smoke['y'] += 0.025
-            smoke['x'] += random.uniform(-0.015, 0.015)
-            smoke['z'] += random.uniform(-0.01, 0.01)
-            smoke['life'] -= dt
-            smoke['size'] += 0.012
-            
-    def emit_smoke(self):
-        if self.smoke_timer > 0.15:
-            self.smoke_timer = 0
-            for chimney_x in [-0.2, 0.2]:
-                self.smoke_particles.append({
-                    'x': self.pos[0] + chimney_x, 
-                    'y': self.pos[1] + 0.9, 
-                    'z': self.pos[2],
-                    'size': 0.12,
-                    'life': 2.5
-                })
-    
-    def draw(self):
-        glPushMatrix()
-        glTranslatef(*self.pos)
-        
-        # Building
-        glColor3f(0.21, 0.36, 0.45)
-        glPushMatrix()
-        glScalef(0.9, 0.7, 0.7)
-        draw_cube(1.0)
-        glPopMatrix()
-        
-        # Windows
-        glColor3f(0.70, 0.90, 1.00)
-        for i in range(-1, 2):
-            for j in range(2):
-                glPushMatrix()
-                glTranslatef(i * 0.28, -0.1 + j * 0.28, 0.36)
-                glScalef(0.16, 0.16, 0.01)
-                draw_cube(1.0)
-                glPopMatrix()
-        
-        # Chimneys
-        glColor3f(0.25, 0.28, 0.32)
-        glPushMatrix()
-        glTranslatef(-0.2, 0.6, 0)
-        glScalef(0.16, 0.5, 0.16)
-        draw_cube(1.0)
-        glPopMatrix()
-        
-        glPushMatrix()
-        glTranslatef(0.2, 0.7, 0)
-        glScalef(0.16, 0.6, 0.16)
-        draw_cube(1.0)
-        glPopMatrix()
-        
-        glPopMatrix()
-        
-        # Draw smoke
-        for smoke in self.smoke_particles:
-            alpha = smoke['life'] / 2.5
-            glColor4f(0.65, 0.65, 0.68, alpha * 0.6)
-            glPushMatrix()
-            glTranslatef(smoke['x'], smoke['y'], smoke['z'])
-            draw_sphere(smoke['size'], 10, 10)
-            glPopMatrix()
-
-# Class untuk Cow
-class Cow:
-    def __init__(self, x, y, z):
-        self.pos = [x, y, z]
-        self.breath_timer = 0
-        self.breathing = False
-        self.walk_offset = random.uniform(0, 2 * math.pi)
-        
-    def update(self, dt, time):
-        self.breath_timer += dt
-        if self.breath_timer > 2.5:
-            self.breathing = True
-            if self.breath_timer > 3.0:
-                self.breath_timer = 0
-        else:
-            self.breathing = False
-    
-    def draw(self, time):
-        glPushMatrix()
-        glTranslatef(*self.pos)
-        
-        # Gentle bobbing
-        bob = math.sin(time * 2.5 + self.walk_offset) * 0.04
-        glTranslatef(0, bob, 0)
-        
-        # Body
-        glColor3f(0.255, 0.252, 0.247)
-        glPushMatrix()
-        glScalef(0.55, 0.35, 0.35)
-        draw_cube(1.0)
-        glPopMatrix()
-        
-        # Head
-        glPushMatrix()
-        glTranslatef(-0.38, 0.05, 0)
-        glScalef(0.28, 0.23, 0.23)
-        draw_cube(1.0)
-        glPopMatrix()
-        
-        # Ears
-        glColor3f(1.0, 0.9, 0.9)
-        glPushMatrix()
-        glTranslatef(-0.45, 0.15, 0.13)
-        glScalef(0.08, 0.12, 0.02)
-        draw_cube(1.0)
-        glPopMatrix()
-        
-        glPushMatrix()
-        glTranslatef(-0.45, 0.15, -0.13)
-        glScalef(0.08, 0.12, 0.02)
-        draw_cube(1.0)
-        glPopMatrix()
-        
-        # Spots
-        glColor3f(0.1, 0.05, 0.05)
-        glPushMatrix()
-        glTranslatef(-0.12, 0.08, 0.19)
-        draw_sphere(0.09, 10, 10)
-        glPopMatrix()
-        
-        glPushMatrix()
-        glTranslatef(0.12, 0.02, 0.19)
-        draw_sphere(0.10, 10, 10)
-        glPopMatrix()
-        
-        # Legs
-        glColor3f(0.95, 0.95, 0.95)
-        for i in [-0.18, -0.06, 0.06, 0.18]:
-            glPushMatrix()
-            glTranslatef(i, -0.28, 0)
-            glScalef(0.07, 0.24, 0.07)
-            draw_cube(1.0)
-            glPopMatrix()
-        
-        # Tail
-        glPushMatrix()
-        glTranslatef(0.35, -0.05, 0)
-        glRotatef(20 + math.sin(time * 4) * 15, 0, 0, 1)
-        glScalef(0.03, 0.25, 0.03)
-        draw_cube(1.0)
-        glPopMatrix()
-        
-        # CO2 bubble when breathing
-        if self.breathing:
-            glColor4f(0.35, 0.55, 0.95, 0.6)
-            size = 0.18 if self.breath_timer < 2.7 else 0.22
-            glPushMatrix()
-            glTranslatef(-0.55, 0.18, 0)
-            draw_sphere(size, 12, 12)
-            glPopMatrix()
-        
-        glPopMatrix()
-
-# Class untuk Car
-class Car:
-    def __init__(self, x, y, z):
-        self.pos = [x, y, z]
-        self.exhaust_particles = []
-        self.exhaust_timer = 0
-        self.wheel_rotation = 0
-        
-    def update(self, dt, time):
-        self.exhaust_timer += dt
-        self.wheel_rotation += dt * 100
-        
-        # Update exhaust
-        self.exhaust_particles = [e for e in self.exhaust_particles if e['life'] > 0]
-        for exhaust in self.exhaust_particles:
-            exhaust['x'] += 0.025
-            exhaust['y'] += random.uniform(-0.008, 0.012)
-            exhaust['z'] += random.uniform(-0.005, 0.005)
-            exhaust['life'] -= dt
-            
-    def emit_exhaust(self):
-        if self.exhaust_timer > 0.25:
-            self.exhaust_timer = 0
-            self.exhaust_particles.append({
-                'x': self.pos[0] + 0.45,
-                'y': self.pos[1] - 0.12,
-                'z': self.pos[2],
-                'life': 1.8
-            })
-    
-    def draw(self):
-        glPushMatrix()
-        glTranslatef(*self.pos)
-        
-        # Body
-        glColor3f(0.95, 0.75, 0.1)
-        glPushMatrix()
-        glScalef(0.65, 0.23, 0.28)
-        draw_cube(1.0)
-        glPopMatrix()
-        
-        # Roof
-        glPushMatrix()
-        glTranslatef(0, 0.18, 0)
-        glScalef(0.38, 0.22, 0.26)
-        draw_cube(1.0)
-        glPopMatrix()
-        
-        # Windows
-        glColor3f(0.50, 0.75, 0.88)
-        glPushMatrix()
-        glTranslatef(-0.05, 0.18, 0.14)
-        glScalef(0.16, 0.16, 0.01)
-        draw_cube(1.0)
-        glPopMatrix()
-        
-        glPushMatrix()
-        glTranslatef(-0.05, 0.18, -0.14)
-        glScalef(0.16, 0.16, 0.01)
-        draw_cube(1.0)
-        glPopMatrix()
-        
-        # Wheels
-        glColor3f(0.15, 0.15, 0.15)
-        for x in [-0.22, 0.22]:
-            for z in [-0.17, 0.17]:
-                glPushMatrix()
-                glTranslatef(x, -0.17, z)
-                glRotatef(self.wheel_rotation, 0, 0, 1)
-                draw_sphere(0.09, 12, 12)
-                glPopMatrix()
-        
-        glPopMatrix()
-        
-        # Draw exhaust
-        for exhaust in self.exhaust_particles:
-            alpha = exhaust['life'] / 1.8
-            glColor4f(0.5, 0.5, 0.52, alpha * 0.65)
-            glPushMatrix()
-            glTranslatef(exhaust['x'], exhaust['y'], exhaust['z'])
-            draw_sphere(0.10, 10, 10)
-            glPopMatrix()
-
-# Class untuk Soil/Ground dengan fosil
-class Soil:
-    def __init__(self, x, y, z):
-        self.pos = [x, y, z]
-        
-    def draw(self):
-        glPushMatrix()
-        glTranslatef(*self.pos)
-        
-        # Soil layer
-        glColor3f(0.45, 0.30, 0.20)
-        glPushMatrix()
-        glScalef(0.9, 0.25, 0.6)
-        draw_cube(1.0)
-        glPopMatrix()
-        
-        # Fossils/bones
-        glColor3f(0.92, 0.90, 0.82)
-        for i in range(3):
-            glPushMatrix()
-            glTranslatef(-0.3 + i * 0.3, 0, 0.1)
-            glRotatef(45 + i * 30, 0, 0, 1)
-            glScalef(0.18, 0.04, 0.04)
-            draw_cube(1.0)
-            glPopMatrix()
-        
-        # Small stones
-        glColor3f(0.45, 0.30, 0.20)
-        for i in range(4):
-            glPushMatrix()
-            glTranslatef(-0.35 + i * 0.25, -0.05, -0.15)
-            draw_sphere(0.04, 8, 8)
-            glPopMatrix()
-        
-        # Roots coming down
-        glColor3f(0.45, 0.30, 0.15)
-        for i in range(2):
-            glPushMatrix()
-            glTranslatef(-0.25 + i * 0.5, 0.18, 0)
-            glScalef(0.025, 0.18, 0.025)
-            draw_cube(1.0)
-            glPopMatrix()
-        
-        glPopMatrix()
-
-# Main simulation class
-class CarbonCycleSimulation:
-    def __init__(self):
-        pygame.init()
-        
-        # Get display info for better window handling
-        display_info = pygame.display.Info()
-        self.screen_width = min(WIDTH, display_info.current_w - 100)
-        self.screen_height = min(HEIGHT, display_info.current_h - 100)
-        
-        self.display = pygame.display.set_mode((self.screen_width, self.screen_height), DOUBLEBUF | OPENGL | RESIZABLE)
-        pygame.display.set_caption("Simulasi 3D Siklus Karbon - Interaktif")
-        
-        self.setup_opengl()
-        self.reset_scene()
-        
-        # Font for UI
-        self.font = pygame.font.Font(None, 40)
-        self.small_font = pygame.font.Font(None, 26)
-        
-    def setup_opengl(self):
-        # Setup OpenGL
-        glEnable(GL_DEPTH_TEST)
-        glEnable(GL_BLEND)
-        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
-        glEnable(GL_LIGHTING)
-        glEnable(GL_LIGHT0)
-        glEnable(GL_LIGHT1)
-        glEnable(GL_COLOR_MATERIAL)
-        glColorMaterial(GL_FRONT_AND_BACK, GL_AMBIENT_AND_DIFFUSE)
-        
-        # Sky blue background
-        glClearColor(0.53, 0.81, 0.92, 1.0)
-        
-        # Main light (sun)
-        glLight(GL_LIGHT0, GL_POSITION, (8, 12, 6, 1))
-        glLight(GL_LIGHT0, GL_AMBIENT, (0.5, 0.5, 0.5, 1))
-        glLight(GL_LIGHT0, GL_DIFFUSE, (1.0, 0.98, 0.9, 1))
-        glLight(GL_LIGHT0, GL_SPECULAR, (1.0, 1.0, 0.9, 1))
-        
-        # Fill light
-        glLight(GL_LIGHT1, GL_POSITION, (-5, 8, -5, 1))
-        glLight(GL_LIGHT1, GL_AMBIENT, (0.3, 0.3, 0.35, 1))
-        glLight(GL_LIGHT1, GL_DIFFUSE, (0.5, 0.5, 0.6, 1))
-        
-        # Perspective
-        glMatrixMode(GL_PROJECTION)
-        glLoadIdentity()
-        gluPerspective(50, self.screen_width / self.screen_height, 0.1, 50.0)
-        glMatrixMode(GL_MODELVIEW)
-        glLoadIdentity()
-        glTranslatef(0, -1, -16)
-        
-    def reset_scene(self):
-        # Game state
-        self.clock = pygame.time.Clock()
-        self.running = True
-        self.paused = False
-        self.time = 0
-        
-        # Camera rotation
-        self.rotation_x = 25
-        self.rotation_y = 0
-        self.auto_rotate = True
-        self.mouse_down = False
-        self.last_mouse_pos = None
-        
-        # Objects
-        self.trees = []
-        self.factories = []
-        self.cows = []
-        self.cars = []
-        self.soils = []
-        self.co2_particles = []
-        
-        # Stats
-        self.co2_level = 100
-        self.photosynthesis_rate = 0
-        self.emission_rate = 0
-        
-        # Initialize scene
-        self.init_scene()
-        
-    def init_scene(self):
-        # Add initial objects in a circle
-        angles = np.linspace(0, 2 * np.pi, 12, endpoint=False)
-        radius = 4.5
-        
-        for i, angle in enumerate(angles):
-            x = radius * np.cos(angle)
-            z = radius * np.sin(angle)
-            
-            if i % 4 == 0:
-                self.trees.append(Tree(x, -1, z))
-            elif i % 4 == 1:
-                self.factories.append(Factory(x, -1, z))
-            elif i % 4 == 2:
-                self.cows.append(Cow(x, -1, z))
-            else:
-                self.cars.append(Car(x, -1, z))
-        
-        # Add soil at bottom - fixed positions
-        soil_positions = [
-            (-3.5, -2.3, 0),
-            (-0.5, -2.3, 0),
-            (2.5, -2.3, 0)
-        ]
-        for pos in soil_positions:
-            self.soils.append(Soil(*pos))
-        
-        # Add some initial CO2 particles
-        for _ in range(30):
-            x = random.uniform(-4, 4)
-            y = random.uniform(-1, 3)
-            z = random.uniform(-4, 4)
-            self.co2_particles.append(CO2Particle(x, y, z))
-    
-    def add_object(self, obj_type):
-        angle = random.uniform(0, 2 * np.pi)
-        radius = random.uniform(3.5, 5.5)
-        x = radius * np.cos(angle)
-        z = radius * np.sin(angle)
-        
-        if obj_type == 'tree':
-            self.trees.append(Tree(x, -1, z))
-            self.co2_level -= 5
-        elif obj_type == 'factory':
-            self.factories.append(Factory(x, -1, z))
-            self.co2_level += 10
-        elif obj_type == 'cow':
-            self.cows.append(Cow(x, -1, z))
-            self.co2_level += 3
-        elif obj_type == 'car':
-            self.cars.append(Car(x, -1, z))
-            self.co2_level += 8
-    
-    def draw_text_2d(self, text, x, y, font, color=(255, 255, 255)):
-        text_surface = font.render(text, True, color)
-        text_data = pygame.image.tostring(text_surface, "RGBA", True)
-        
-        glMatrixMode(GL_PROJECTION)
-        glPushMatrix()
-        glLoadIdentity()
-        glOrtho(0, self.screen_width, self.screen_height, 0, -1, 1)
-        glMatrixMode(GL_MODELVIEW)
-        glPushMatrix()
-        glLoadIdentity()
-        
-        glDisable(GL_LIGHTING)
-        glDisable(GL_DEPTH_TEST)
-        
-        glRasterPos2f(x, y)
-        glDrawPixels(text_surface.get_width(), text_surface.get_height(),
-                     GL_RGBA, GL_UNSIGNED_BYTE, text_data)
-        
-        glEnable(GL_DEPTH_TEST)
-        glEnable(GL_LIGHTING)
-        
-        glPopMatrix()
-        glMatrixMode(GL_PROJECTION)
-        glPopMatrix()
-        glMatrixMode(GL_MODELVIEW)
-    
-    def draw_clouds(self):
-        glDisable(GL_LIGHTING)
-        
-        # Multiple cloud layers
-        cloud_positions = [
-            (-8, 6, -10), (5, 7, -12), (-3, 8, -15),
-            (10, 6.5, -8), (-6, 7.5, -11), (3, 8.5, -14),
-            (8, 6, -13), (-10, 7, -9)
-        ]
-        
-        for i, (x, y, z) in enumerate(cloud_positions):
-            offset_x = math.sin(self.time * 0.3 + i) * 2
-            offset_y = math.sin(self.time * 0.5 + i * 0.7) * 0.3
-            
-            glColor4f(1.0, 1.0, 1.0, 0.85)
-            glPushMatrix()
-            glTranslatef(x + offset_x, y + offset_y, z)
-            
-            # Multi-sphere cloud
-            draw_sphere(1.2, 12, 12)
-            glTranslatef(0.8, 0, 0)
-            draw_sphere(1.0, 12, 12)
-            glTranslatef(-0.4, 0.3, 0)
-            draw_sphere(0.9, 12, 12)
-            glTranslatef(-0.8, 0, 0)
-            draw_sphere(0.85, 12, 12)
-            
-            glPopMatrix()
-        
-        glEnable(GL_LIGHTING)
-    
-    def draw_co2_center(self):
-        # Central CO2 visualization
-        glPushMatrix()
-        glTranslatef(0, 1.5, 0)
-        
-        # Pulsing effect
-        pulse = 1.0 + 0.15 * math.sin(self.time * 3)
-        
-        # Outer glow
-        glColor4f(0.35, 0.55, 0.95, 0.25)
-        draw_sphere(0.9 * pulse, 20, 20)
-        
-        # Main sphere
-        glColor4f(0.45, 0.70, 1.0, 0.7)
-        draw_sphere(0.65 * pulse, 20, 20)
-        
-        # Inner core
-        glColor4f(0.6, 0.8, 1.0, 0.9)
-        draw_sphere(0.4 * pulse, 20, 20)
-        
-        glPopMatrix()
-    
-    def update(self, dt):
-        if self.paused:
-            return
-            
-        self.time += dt
-        
-        # Update all objects
-        for tree in self.trees:
-            tree.update(dt, self.time)
-            
-        for factory in self.factories:
-            factory.update(dt)
-            factory.emit_smoke()
-            
-        for cow in self.cows:
-            cow.update(dt, self.time)
-            
-        for car in self.cars:
-            car.update(dt, self.time)
-            car.emit_exhaust()
-        
-        # Update CO2 particles
-        self.co2_particles = [p for p in self.co2_particles if p.update(dt, self.time)]
-        
-        # Add new CO2 from sources more dynamically
-        if random.random() < 0.15:
-            if self.factories:
-                factory = random.choice(self.factories)
-                for _ in range(2):
-                    self.co2_particles.append(CO2Particle(
-                        factory.pos[0] + random.uniform(-0.3, 0.3), 
-                        factory.pos[1] + 0.8, 
-                        factory.pos[2] + random.uniform(-0.3, 0.3)
-                    ))
-                    
-        if random.random() < 0.08 and self.cows:
-            cow = random.choice(self.cows)
-            self.co2_particles.append(CO2Particle(
-                cow.pos[0] - 0.4, cow.pos[1] + 0.3, cow.pos[2]
-            ))
-        
-        if random.random() < 0.12 and self.cars:
-            car = random.choice(self.cars)
-            self.co2_particles.append(CO2Particle(
-                car.pos[0] + 0.4, car.pos[1] - 0.1, car.pos[2]
-            ))
-        
-        # Trees absorb CO2 - more dynamic
-        for tree in self.trees:
-            for particle in self.co2_particles[:]:
-                dx = particle.pos[0] - tree.pos[0]
-                dy = particle.pos[1] - tree.pos[1]
-                dz = particle.pos[2] - tree.pos[2]
-                dist = math.sqrt(dx*dx + dy*dy + dz*dz)
-                
-                if dist < 0.9:
-                    self.co2_particles.remove(particle)
-                    tree.absorb_co2()
-                    self.co2_level -= 0.5
-                    break
-        
-        # Calculate rates
-        self.photosynthesis_rate = len(self.trees) * 2
-        self.emission_rate = len(self.factories) * 5 + len(self.cars) * 3 + len(self.cows)
-        
-        # Update CO2 level
-        self.co2_level += (self.emission_rate - self.photosynthesis_rate) * dt * 0.1
-        self.co2_level = max(0, min(500, self.co2_level))
-        
-        # Auto rotation
-        if self.auto_rotate and not self.mouse_down:
-            self.rotation_y += 12 * dt
-    
-    def draw(self):
-        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-        
-        glPushMatrix()
-        
-        # Apply rotation
-        glRotatef(self.rotation_x, 1, 0, 0)
-        glRotatef(self.rotation_y, 0, 1, 0)
-        
-        # Draw clouds in background
-        self.draw_clouds()
-        
-        # Draw ground plane (grass)
-        glDisable(GL_LIGHTING)
-        glColor3f(0.4, 0.75, 0.35)
-        glBegin(GL_QUADS)
-        glVertex3f(-12, -2.2, -12)
-        glVertex3f(12, -2.2, -12)
-        glVertex3f(12, -2.2, 12)
-        glVertex3f(-12, -2.2, 12)
-        glEnd()
-        
-        # Add some grass details
-        glColor3f(0.35, 0.70, 0.30)
-        for i in range(20):
-            for j in range(20):
-                x = -10 + i
-                z = -10 + j
-                if random.random() < 0.3:
-                    glBegin(GL_TRIANGLES)
-                    glVertex3f(x, -2.2, z)
-                    glVertex3f(x + 0.05, -2.1, z)
-                    glVertex3f(x + 0.1, -2.2, z)
-                    glEnd()
-        
-        glEnable(GL_LIGHTING)
-        
-        # Draw central CO2
-        self.draw_co2_center()
-        
-        # Draw all objects
-        for tree in self.trees:
-            tree.draw()
-            
-        for factory in self.factories:
-            factory.draw()
-            
-        for cow in self.cows:
-            cow.draw(self.time)
-            
-        for car in self.cars:
-            car.draw()
-            
-        for soil in self.soils:
-            soil.draw()
-            
-        for particle in self.co2_particles:
-            particle.draw()
-        
-        # Draw sun
-        glDisable(GL_LIGHTING)
-        glColor3f(1.0, 0.95, 0.7)
-        glPushMatrix()
-        glTranslatef(8, 10, -12)
-        draw_sphere(1.5, 20, 20)
-        glPopMatrix()
-        glEnable(GL_LIGHTING)
-        
-        glPopMatrix()
-        
-        # Draw UI
-        self.draw_ui()
-        
-        pygame.display.flip()
-    
-    def draw_ui(self):
-        # Semi-transparent background for text
-        glDisable(GL_LIGHTING)
-        glDisable(GL_DEPTH_TEST)
-        
-        glMatrixMode(GL_PROJECTION)
-        glPushMatrix()
-        glLoadIdentity()
-        glOrtho(0, self.screen_width, self.screen_height, 0, -1, 1)
-        glMatrixMode(GL_MODELVIEW)
-        glPushMatrix()
-        glLoadIdentity()
-        
-        # Dark overlay for title
-        glColor4f(0.0, 0.0, 0.0, 0.5)
-        glBegin(GL_QUADS)
-        glVertex2f(0, 0)
-        glVertex2f(self.screen_width, 0)
-        glVertex2f(self.screen_width, 70)
-        glVertex2f(0, 70)
-        glEnd()
-        
-        # Stats background
-        glColor4f(0.0, 0.0, 0.0, 0.4)
-        glBegin(GL_QUADS)
-        glVertex2f(10, 75)
-        glVertex2f(350, 75)
-        glVertex2f(350, 330)
-        glVertex2f(10, 330)
-        glEnd()
-        
-        # Controls background
-        glBegin(GL_QUADS)
-        glVertex2f(10, self.screen_height - 180)
-        glVertex2f(520, self.screen_height - 180)
-        glVertex2f(520, self.screen_height - 10)
-        glVertex2f(10, self.screen_height - 180)
-        glEnd()
-        
-        glPopMatrix()
-        glMatrixMode(GL_PROJECTION)
-        glPopMatrix()
-        glMatrixMode(GL_MODELVIEW)
-        
-        glEnable(GL_DEPTH_TEST)
-        glEnable(GL_LIGHTING)
-        
-        # Title
-        self.draw_text_2d("SIMULASI 3D SIKLUS KARBON", 25, 35, self.font, (255, 255, 150))
-        
-        # Stats
-        y = 105
-        co2_color = (100, 255, 150) if self.co2_level < 150 else (255, 200, 100) if self.co2_level < 300 else (255, 100, 100)
-        self.draw_text_2d(f"CO2 Level: {int(self.co2_level)} ppm", 25, y, self.small_font, co2_color)
-        self.draw_text_2d(f"Fotosintesis: -{self.photosynthesis_rate}", 25, y + 35, self.small_font, (100, 255, 150))
-        self.draw_text_2d(f"Emisi: +{self.emission_rate}", 25, y + 70, self.small_font, (255, 150, 150))
-        
-        # Object counts
-        y = 245
-        self.draw_text_2d(f"🌳 Pohon: {len(self.trees)}", 25, y, self.small_font, (150, 255, 150))
-        self.draw_text_2d(f"🏭 Pabrik: {len(self.factories)}", 25, y + 30, self.small_font, (200, 200, 200))
-        self.draw_text_2d(f"🐄 Hewan: {len(self.cows)}", 25, y + 60, self.small_font, (255, 230, 180))
-        self.draw_text_2d(f"🚗 Mobil: {len(self.cars)}", 25, y + 90, self.small_font, (255, 235, 150))
-        
-        # Controls
-        y = self.screen_height - 165
-        self.draw_text_2d("KONTROL:", 25, y, self.small_font, (255, 255, 150))
-        self.draw_text_2d("T - Tambah Pohon (kurangi CO2)", 25, y + 30, self.small_font, (220, 220, 220))
-        self.draw_text_2d("F - Tambah Pabrik | C - Tambah Hewan | V - Tambah Mobil", 25, y + 58, self.small_font, (220, 220, 220))
-        self.draw_text_2d("SPACE - Pause | R - Reset | Mouse Drag - Rotate", 25, y + 86, self.small_font, (220, 220, 220))
-        self.draw_text_2d("A - Toggle Auto-Rotate", 25, y + 114, self.small_font, (220, 220, 220))
-    
-    def handle_events(self):
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                self.running = False
-                
-            elif event.type == pygame.VIDEORESIZE:
-                self.screen_width = event.w
-                self.screen_height = event.h
-                glViewport(0, 0, event.w, event.h)
-                glMatrixMode(GL_PROJECTION)
-                glLoadIdentity()
-                gluPerspective(50, event.w / event.h, 0.1, 50.0)
-                glMatrixMode(GL_MODELVIEW)
-                
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_SPACE:
-                    self.paused = not self.paused
-                elif event.key == pygame.K_r:
-                    self.reset_scene()
-                elif event.key == pygame.K_t:
-                    self.add_object('tree')
-                elif event.key == pygame.K_f:
-                    self.add_object('factory')
-                elif event.key == pygame.K_c:
-                    self.add_object('cow')
-                elif event.key == pygame.K_v:
-                    self.add_object('car')
-                elif event.key == pygame.K_a:
-                    self.auto_rotate = not self.auto_rotate
-                elif event.key == pygame.K_ESCAPE:
-                    self.running = False
-                    
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                self.mouse_down = True
-                self.last_mouse_pos = pygame.mouse.get_pos()
-                self.auto_rotate = False
-                
-            elif event.type == pygame.MOUSEBUTTONUP:
-                self.mouse_down = False
-                
-            elif event.type == pygame.MOUSEMOTION:
-                if self.mouse_down and self.last_mouse_pos:
-                    x, y = pygame.mouse.get_pos()
-                    dx = x - self.last_mouse_pos[0]
-                    dy = y - self.last_mouse_pos[1]
-                    
-                    self.rotation_y += dx * 0.4
-                    self.rotation_x += dy * 0.4
-                    self.rotation_x = max(-90, min(90, self.rotation_x))
-                    
-                    self.last_mouse_pos = (x, y)
-    
-    def run(self):
-        while self.running:
-            dt = self.clock.tick(FPS) / 1000.0
-            
-            self.handle_events()
-            self.update(dt)
-            self.draw()
-        
-        pygame.quit()
-
-# Main entry point
-if __name__ == "__main__":
-    sim = CarbonCycleSimulation()
-    sim.run()
\ No newline at end of file
+import argparse
+import csv
+import ctypes
+import itertools
+import json
+import math
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from collections import OrderedDict
+import numpy as np
+
+try:
+    import pygame
+    from pygame.locals import *
+    from OpenGL.GL import *
+    from OpenGL.GLU import *
+except ImportError:
+    # Headless runs only need SimulationCore (pure Python + NumPy)
+    pygame = None
+
+# Konstanta
+WIDTH, HEIGHT = 1400, 900
+FPS = 60
+SIM_DT = 1.0 / FPS           # fixed simulation step (seconds)
+SIM_SHARE = 0.75              # share of a frame (or sim-thread tick) the simulation may step for
+SIM_FRAME_BUDGET = SIM_SHARE / FPS  # wall-clock time per rendered frame the simulation may use
+TIME_SCALES = [1, 10, 100, None]  # None = unbounded, as many steps as the budget allows
+
+# CO2 change (ppm) when the user adds an object
+OBJECT_TYPES = ('tree', 'factory', 'cow', 'car')
+CO2_IMPACT = {'tree': -5, 'factory': 10, 'cow': 3, 'car': 8}
+ABSORB_RADIUS = 0.9
+# CO2 particles per second per source (the default scene with 3 of each matches the
+# old per-type rates: 0.15/frame x 2 particles, 0.08/frame, 0.12/frame at 60 FPS)
+EMISSION_SOURCES = (('factory', 'factories'), ('cow', 'cows'), ('car', 'cars'))
+EMISSION_RATES = {'factory': 6.0, 'cow': 1.6, 'car': 2.4}
+EMISSION_OFFSETS = {'factory': (0.0, 0.8, 0.0), 'cow': (-0.4, 0.3, 0.0), 'car': (0.4, -0.1, 0.0)}
+EMISSION_JITTER = {'factory': 0.3, 'cow': 0.0, 'car': 0.0}  # random x/z spread around the offset
+GRASS_BLADES = 12000
+FRAME_BUDGET_MS = 1000.0 / FPS  # default target for the quality governor
+# Render quality tiers, best first: LOD detail (scale on projected size), clouds drawn,
+# particle sprite cap (None = all) and grass blades
+QUALITY_TIERS = (
+    {'name': 'tinggi', 'detail': 1.0, 'clouds': 8, 'sprites': None, 'grass': GRASS_BLADES},
+    {'name': 'sedang', 'detail': 0.6, 'clouds': 6, 'sprites': 6000, 'grass': 8000},
+    {'name': 'rendah', 'detail': 0.35, 'clouds': 4, 'sprites': 2500, 'grass': 4000},
+    {'name': 'minimal', 'detail': 0.2, 'clouds': 2, 'sprites': 1000, 'grass': 1500},
+)
+QUALITY_MODES = ('auto',) + tuple(tier['name'] for tier in QUALITY_TIERS)
+# Reservoir carbon model (ppm-equivalent, time in years), used instead of the particle sim
+CARBON_MODELS = ('particles', 'reservoir')
+RESERVOIRS = ('atmosphere', 'biosphere', 'soil', 'fossil')
+CARBON_YEARS_PER_SECOND = 1.0  # reservoir mode: one simulated second is one model year
+CARBON_RATES = {               # per year
+    'uptake': 0.08,            # baseline photosynthesis (grass, ocean): atmosphere -> biosphere
+    'tree': 0.002,             # extra uptake per tree
+    'respiration': 0.02,       # biosphere -> atmosphere
+    'grazing': 0.0005,         # extra biosphere -> atmosphere per cow
+    'litter': 0.02,            # biosphere -> soil
+    'factory': 0.00025,        # fossil -> atmosphere per factory
+    'car': 0.00015,            # fossil -> atmosphere per car
+}
+SOIL_CARBON = 150.0            # per Soil tile; soil decay is set so the natural cycle starts balanced
+FOSSIL_CARBON = 2000.0
+LAYOUTS = ('ring', 'grid', 'poisson')  # bulk placement: old polar ring, jittered grid, Poisson-disk
+BULK_RADIUS = 9.5         # outer radius of 'grid'/'poisson' placement (the grass is +-10)
+BULK_INNER_RADIUS = 1.5   # keep the CO2 centre clear
+BULK_MIN_DISTANCE = 0.8   # default spacing for 'poisson'
+BULK_ROUNDS = 32          # dart-throwing rounds before giving up on a full area
+BULK_MIN_DARTS = 64       # smallest dart round, so a nearly full area still gets a fair try
+BULK_FILL_SPACING = 0.5   # keypress batches: spacing as a fraction of the area per object
+SPAWN_BATCHES = (1, 10, 100, 1000)  # objects per keypress, cycled with B
+EMITTER_CAPACITY = 20000  # smoke + exhaust puffs shared by all factories and cars
+FOV_Y = 50  # vertical field of view (degrees)
+LOD_LEVELS = 3
+LOD_PIXELS = (48, 16)  # projected diameter (px) below which LOD level 1 / level 2 is used
+LOD_HYSTERESIS = 0.2   # +-20% band around each threshold so objects don't pop back and forth
+RENDERERS = ('legacy', 'shader')
+# Eye-space positional lights as (position, ambient, diffuse): sun, then fill
+LIGHTS = (
+    ((8, 12, 6), (0.5, 0.5, 0.5), (1.0, 0.98, 0.9)),
+    ((-5, 8, -5), (0.3, 0.3, 0.35), (0.5, 0.5, 0.6)),
+)
+GRASS_SEED = 2024
+
+# Class untuk profiler per frame (ring buffer, hampir gratis saat mati)
+class FrameProfiler:
+    PHASES = ('events', 'update', 'clouds', 'grass', 'entities', 'particles', 'ui', 'present')
+
+    def __init__(self, capacity=600):
+        self.enabled = False
+        self.capacity = capacity
+        self.index = {name: i for i, name in enumerate(self.PHASES)}
+        self.samples = np.zeros((capacity, len(self.PHASES) + 1), dtype=np.float32)  # last column: frame
+        self.current = np.zeros(len(self.PHASES) + 1, dtype=np.float32)
+        self.frames = 0
+        self.frame_start = self.last = 0.0
+        self.draw_calls = 0
+        self.last_draw_calls = 0
+
+    def begin_frame(self):
+        self.draw_calls = 0
+        if not self.enabled:
+            return
+        self.frame_start = self.last = time.perf_counter()
+        self.current[:] = 0
+
+    def lap(self, phase):
+        # Charge the time since the previous lap to `phase`
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.current[self.index[phase]] += (now - self.last) * 1000
+        self.last = now
+
+    def end_frame(self):
+        self.last_draw_calls = self.draw_calls
+        if not self.enabled:
+            return
+        self.current[-1] = (time.perf_counter() - self.frame_start) * 1000
+        self.samples[self.frames % self.capacity] = self.current
+        self.frames += 1
+
+    def history(self):
+        # Recorded frames, oldest first
+        if self.frames <= self.capacity:
+            return self.samples[:self.frames]
+        start = self.frames % self.capacity
+        return np.concatenate([self.samples[start:], self.samples[:start]])
+
+    def averages(self, frames=60):
+        recent = self.history()[-frames:]
+        if not len(recent):
+            return np.zeros(len(self.PHASES) + 1, dtype=np.float32)
+        return recent.mean(axis=0)
+
+    def dump(self, path):
+        np.savetxt(path, self.history(), delimiter=',', fmt='%.3f', comments='',
+                   header=','.join(self.PHASES + ('frame',)))
+        return path
+
+profiler = FrameProfiler()
+
+# Class untuk pengatur kualitas adaptif (menjaga target waktu frame)
+class QualityGovernor:
+    # Moves between QUALITY_TIERS to keep frame work time (events to present, not
+    # the frame-cap wait) within budget. A drop needs a short window over budget, a
+    # climb a long one well under it, and frames right after a change are ignored.
+    # A climb that ends in a drop doubles the next climb window, so a tier that
+    # cannot hold the budget is not retried every few seconds.
+    DOWN = 1.0        # mean over budget * DOWN -> one tier lower
+    UP = 0.6          # mean under budget * UP -> one tier higher
+    DOWN_WINDOW = 30  # frames
+    UP_WINDOW = 180
+    MAX_BACKOFF = 8
+    COOLDOWN = 60
+
+    def __init__(self, budget_ms=FRAME_BUDGET_MS, tier=0, adaptive=True):
+        self.budget_ms = budget_ms
+        self.tier = tier
+        self.adaptive = adaptive
+        self.samples = np.zeros(self.UP_WINDOW * self.MAX_BACKOFF)
+        self.count = 0  # samples since the last change
+        self.up_window = self.UP_WINDOW
+        self.last_change = 0
+
+    @property
+    def settings(self):
+        return QUALITY_TIERS[self.tier]
+
+    def recent(self, frames):
+        index = np.arange(self.count - frames, self.count) % len(self.samples)
+        return float(self.samples[index].mean())
+
+    def add(self, frame_ms):
+        # -> True when the tier changed
+        self.samples[self.count % len(self.samples)] = frame_ms
+        self.count += 1
+        if not self.adaptive:
+            return False
+        measured = self.count - self.COOLDOWN
+        if measured >= self.DOWN_WINDOW and self.tier < len(QUALITY_TIERS) - 1:
+            mean = self.recent(self.DOWN_WINDOW)
+            if mean > self.budget_ms * self.DOWN:
+                if self.last_change < 0:
+                    self.up_window = min(self.up_window * 2, self.UP_WINDOW * self.MAX_BACKOFF)
+                return self.switch(self.tier + 1, mean)
+        if measured >= self.up_window and self.tier > 0:
+            mean = self.recent(self.up_window)
+            if mean < self.budget_ms * self.UP:
+                return self.switch(self.tier - 1, mean)
+        return False
+
+    def switch(self, tier, mean):
+        print(f"Kualitas: {self.settings['name']} -> {QUALITY_TIERS[tier]['name']} "
+              f"(rata-rata {mean:.1f} ms, target {self.budget_ms:.1f} ms)")
+        self.last_change = tier - self.tier  # > 0: dropped, < 0: climbed
+        self.tier = tier
+        self.count = 0
+        return True
+
+# Class untuk cache mesh (display list) per primitive
+class MeshCache:
+    def __init__(self):
+        self.lists = {}
+
+    def get(self, key, build):
+        display_list = self.lists.get(key)
+        if display_list is None:
+            display_list = glGenLists(1)
+            glNewList(display_list, GL_COMPILE)
+            build()
+            glEndList()
+            self.lists[key] = display_list
+        return display_list
+
+    def invalidate(self):
+        # The GL context that owned these lists is gone, just forget them
+        self.lists.clear()
+
+mesh_cache = MeshCache()
+
+def _build_unit_sphere(slices, stacks):
+    quadric = gluNewQuadric()
+    gluSphere(quadric, 1.0, slices, stacks)
+    gluDeleteQuadric(quadric)
+
+def _build_unit_cube():
+    s = 0.5
+    vertices = [
+        [-s, -s, -s], [s, -s, -s], [s, s, -s], [-s, s, -s],  # Back
+        [-s, -s, s], [s, -s, s], [s, s, s], [-s, s, s]       # Front
+    ]
+    
+    faces = [
+        [0, 1, 2, 3], [4, 5, 6, 7], [0, 1, 5, 4],
+        [2, 3, 7, 6], [0, 3, 7, 4], [1, 2, 6, 5]
+    ]
+    
+    normals = [
+        [0, 0, -1], [0, 0, 1], [0, -1, 0],
+        [0, 1, 0], [-1, 0, 0], [1, 0, 0]
+    ]
+    
+    glBegin(GL_QUADS)
+    for i, face in enumerate(faces):
+        glNormal3fv(normals[i])
+        for vertex in face:
+            glVertex3fv(vertices[vertex])
+    glEnd()
+
+# Fungsi helper untuk menggambar sphere tanpa GLUT
+def draw_sphere(radius, slices=20, stacks=20, lod_key=None):
+    # With an lod_key the tessellation follows the sphere's size on screen
+    if lod_key is not None:
+        slices, stacks = lod.sphere_segments(lod_key, radius, slices, stacks)
+    if shader_renderer.enabled:
+        shader_renderer.draw_sphere(radius, slices, stacks)
+        return
+    display_list = mesh_cache.get(('sphere', slices, stacks), lambda: _build_unit_sphere(slices, stacks))
+    glPushMatrix()
+    glScalef(radius, radius, radius)
+    glCallList(display_list)
+    glPopMatrix()
+    profiler.draw_calls += 1
+
+# Fungsi helper untuk menggambar cube
+def draw_cube(size=1.0):
+    display_list = mesh_cache.get(('cube', 1, 1), _build_unit_cube)
+    profiler.draw_calls += 1
+    if size == 1.0:
+        glCallList(display_list)
+        return
+    glPushMatrix()
+    glScalef(size, size, size)
+    glCallList(display_list)
+    glPopMatrix()
+
+# Class untuk mesh terindeks (vertex, normal, index)
+class Mesh:
+    def __init__(self, verts, normals, indices):
+        self.verts = np.asarray(verts, dtype=np.float32)
+        self.normals = np.asarray(normals, dtype=np.float32)
+        self.indices = np.asarray(indices, dtype=np.uint32)
+
+def sphere_mesh(slices, stacks):
+    theta = np.linspace(0, math.pi, stacks + 1)[:, None]
+    phi = np.linspace(0, 2 * math.pi, slices + 1)[None, :]
+    verts = np.stack([
+        np.sin(theta) * np.cos(phi),
+        np.cos(theta) * np.ones_like(phi),
+        np.sin(theta) * np.sin(phi)
+    ], axis=-1).reshape(-1, 3)
+
+    row = slices + 1
+    a = (np.arange(stacks)[:, None] * row + np.arange(slices)[None, :]).ravel()
+    b = a + row
+    indices = np.stack([a, b, a + 1, a + 1, b, b + 1], axis=-1).ravel()
+    return Mesh(verts, verts, indices)
+
+def cube_mesh():
+    s = 0.5
+    corners = np.array([
+        [-s, -s, -s], [s, -s, -s], [s, s, -s], [-s, s, -s],  # Back
+        [-s, -s, s], [s, -s, s], [s, s, s], [-s, s, s]       # Front
+    ])
+    faces = np.array([
+        [0, 1, 2, 3], [4, 5, 6, 7], [0, 1, 5, 4],
+        [2, 3, 7, 6], [0, 3, 7, 4], [1, 2, 6, 5]
+    ])
+    normals = np.array([
+        [0, 0, -1], [0, 0, 1], [0, -1, 0],
+        [0, 1, 0], [-1, 0, 0], [1, 0, 0]
+    ])
+    quad = np.arange(6)[:, None] * 4
+    indices = (quad + np.array([0, 1, 2, 0, 2, 3])).ravel()
+    return Mesh(corners[faces].reshape(-1, 3), np.repeat(normals, 4, axis=0), indices)
+
+def rotate_z(xyz, degrees):
+    # Rotate (..., 3) points about the z axis; degrees broadcasts over leading axes
+    rad = np.radians(degrees)[..., None]
+    c, s = np.cos(rad), np.sin(rad)
+    out = xyz.copy()
+    out[..., 0] = c[..., 0] * xyz[..., 0] - s[..., 0] * xyz[..., 1]
+    out[..., 1] = s[..., 0] * xyz[..., 0] + c[..., 0] * xyz[..., 1]
+    return out
+
+# Class untuk menyusun hierarki part statis sebuah entity menjadi satu mesh
+class ModelBuilder:
+    def __init__(self):
+        self.parts = []
+
+    def add(self, mesh, color, translate=(0, 0, 0), scale=1.0, rotate=0.0,
+            grow=False, swing=False, highlight=None):
+        # Part transform mirrors glTranslatef -> glRotatef(z) -> glScalef
+        scale = np.broadcast_to(np.asarray(scale, dtype=np.float32), (3,))
+        pivot = np.asarray(translate, dtype=np.float32)
+        local = rotate_z(mesh.verts * scale, np.float32(rotate))
+        normals = mesh.normals / scale
+        normals = rotate_z(normals / np.linalg.norm(normals, axis=1, keepdims=True), np.float32(rotate))
+        self.parts.append((mesh, local + pivot, normals, pivot, color, grow, swing,
+                           color if highlight is None else highlight))
+
+    def build(self, alpha=1.0):
+        verts, normals, indices, pivots = [], [], [], []
+        colors, alt_colors, grow_mask, swing_mask = [], [], [], []
+        base = 0
+        for mesh, v, n, pivot, color, grow, swing, alt in self.parts:
+            count = len(v)
+            verts.append(v)
+            normals.append(n)
+            indices.append(mesh.indices + base)
+            pivots.append(np.tile(pivot, (count, 1)))
+            colors.append(np.tile(color, (count, 1)))
+            alt_colors.append(np.tile(alt, (count, 1)))
+            grow_mask.append(np.full(count, grow))
+            swing_mask.append(np.full(count, swing))
+            base += count
+        return InstancedModel(np.concatenate(verts), np.concatenate(normals), np.concatenate(indices),
+                              np.concatenate(pivots), np.concatenate(colors), np.concatenate(alt_colors),
+                              np.concatenate(grow_mask), np.concatenate(swing_mask), alpha)
+
+# Class untuk menggambar semua instance satu tipe entity dalam satu draw call
+class InstancedModel:
+    def __init__(self, verts, normals, indices, pivots, colors, alt_colors, grow_mask, swing_mask, alpha=1.0):
+        self.verts = verts.astype(np.float32)
+        self.normals = normals.astype(np.float32)
+        self.indices = indices.astype(np.uint32)
+        self.pivots = pivots.astype(np.float32)
+        self.colors = colors.astype(np.float32)
+        self.alt_colors = alt_colors.astype(np.float32)
+        self.grow_mask = grow_mask
+        self.swing_mask = swing_mask
+        self.alpha = alpha  # one opacity for the whole model (glows, bubbles)
+        self._color_basis = np.stack([self.colors.ravel(), (self.alt_colors - self.colors).ravel()])
+        self.radius = float(np.linalg.norm(self.verts, axis=1).max())  # bounding sphere about the origin
+        self._instance_indices = np.zeros(0, dtype=np.uint32)
+
+    def instance_indices(self, count):
+        # Index buffer for `count` back-to-back copies of the mesh, grown on demand
+        per_instance = len(self.indices)
+        if len(self._instance_indices) < count * per_instance:
+            base = np.arange(count, dtype=np.uint32)[:, None] * np.uint32(len(self.verts))
+            self._instance_indices = (self.indices[None, :] + base).ravel()
+        return self._instance_indices[:count * per_instance]
+
+    def transform(self, offsets, angle=None, growth=None, swing=None, highlight=None):
+        # Per-instance attributes -> world-space vertex, normal and colour arrays.
+        # Growth and highlight are linear in one per-instance coefficient, so each is
+        # a single [1, k] @ basis product; rotation and offset form one 4x3 matrix.
+        # swing is shared by all instances, so it is applied to the base mesh once.
+        m = len(offsets)
+        base_verts, base_normals = self.verts, self.normals
+        if swing is not None and self.swing_mask.any():
+            angles = np.where(self.swing_mask, np.float32(swing), np.float32(0))
+            base_verts = rotate_z(base_verts - self.pivots, angles) + self.pivots
+            base_normals = rotate_z(base_normals, angles)
+
+        rel = base_verts - self.pivots
+        grown = np.where(self.grow_mask[:, None], rel, np.float32(0))
+        fixed = np.ones((len(base_verts), 4), dtype=np.float32)
+        fixed[:, :3] = base_verts - grown
+        delta = np.zeros_like(fixed)
+        delta[:, :3] = grown
+        coeffs = np.ones((m, 2), dtype=np.float32)
+        coeffs[:, 1] = 1 if growth is None else growth
+        local = (coeffs @ np.stack([fixed.ravel(), delta.ravel()])).reshape(m, -1, 4)
+
+        affine = np.zeros((m, 4, 3), dtype=np.float32)
+        if angle is not None:
+            rad = np.radians(np.asarray(angle, dtype=np.float32))
+            c, s = np.cos(rad), np.sin(rad)
+            affine[:, 0, 0] = c
+            affine[:, 0, 1] = s
+            affine[:, 1, 0] = -s
+            affine[:, 1, 1] = c
+            affine[:, 2, 2] = 1
+        else:
+            affine[:, :3, :3] = np.eye(3, dtype=np.float32)
+        affine[:, 3] = offsets
+        verts = np.matmul(local, affine)
+        normals = np.matmul(base_normals, affine[:, :3])
+
+        coeffs[:, 1] = 0 if highlight is None else np.asarray(highlight, dtype=np.float32)
+        colors = (coeffs @ self._color_basis).reshape(m, -1, 3)
+        return verts, normals, colors
+
+    def draw(self, offsets, angle=None, growth=None, swing=None, highlight=None):
+        if len(offsets) == 0:
+            return
+        if shader_renderer.enabled:
+            shader_renderer.draw_model(self, offsets, angle, growth, swing, highlight, color=(1.0, 1.0, 1.0, self.alpha))
+            return
+        verts, normals, colors = self.transform(offsets, angle, growth, swing, highlight)
+        indices = self.instance_indices(len(offsets))
+        if self.alpha < 1.0:
+            colors = np.concatenate([colors, np.full(colors.shape[:2] + (1,), self.alpha, dtype=np.float32)], axis=2)
+
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_NORMAL_ARRAY)
+        glEnableClientState(GL_COLOR_ARRAY)
+        glVertexPointer(3, GL_FLOAT, 0, np.ascontiguousarray(verts, dtype=np.float32))
+        glNormalPointer(GL_FLOAT, 0, np.ascontiguousarray(normals, dtype=np.float32))
+        glColorPointer(colors.shape[-1], GL_FLOAT, 0, np.ascontiguousarray(colors, dtype=np.float32))
+        glDrawElements(GL_TRIANGLES, len(indices), GL_UNSIGNED_INT, indices)
+        profiler.draw_calls += 1
+        glDisableClientState(GL_COLOR_ARRAY)
+        glDisableClientState(GL_NORMAL_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+
+def lod_segments(segments, level):
+    # Sphere tessellation for an LOD level: halved per level, never below 6
+    return max(6, segments >> level)
+
+# Class untuk view-frustum culling dengan bounding sphere
+class Frustum:
+    def __init__(self):
+        self.planes = None  # (6, 4) world-space planes, normals pointing inward
+        self.culled = 0
+
+    def update(self):
+        # GL matrices come back column-major, so clip = [x, y, z, 1] @ modelview @ projection
+        modelview = np.asarray(glGetFloatv(GL_MODELVIEW_MATRIX), dtype=np.float32).reshape(4, 4)
+        projection = np.asarray(glGetFloatv(GL_PROJECTION_MATRIX), dtype=np.float32).reshape(4, 4)
+        clip = modelview @ projection
+        w = clip[:, 3]
+        planes = np.stack([w + clip[:, 0], w - clip[:, 0],   # left, right
+                           w + clip[:, 1], w - clip[:, 1],   # bottom, top
+                           w + clip[:, 2], w - clip[:, 2]])  # near, far
+        self.planes = planes / np.linalg.norm(planes[:, :3], axis=1, keepdims=True)
+        self.culled = 0
+
+    def test(self, centers, radii):
+        # True for every sphere at least partly inside all six planes
+        centers = np.asarray(centers, dtype=np.float32).reshape(-1, 3)
+        if self.planes is None:
+            return np.ones(len(centers), dtype=bool)
+        distances = centers @ self.planes[:, :3].T + self.planes[:, 3]
+        visible = (distances > -np.reshape(radii, (-1, 1))).all(axis=1)
+        self.culled += len(visible) - int(np.count_nonzero(visible))
+        return visible
+
+    def visible(self, center, radius):
+        return bool(self.test(center, radius)[0])
+
+frustum = Frustum()
+
+# Class untuk pemilihan level of detail dari ukuran objek di layar
+class LodSelector:
+    def __init__(self):
+        self.levels = {}  # key -> (sorted handles, their levels) from last frame
+        self.sphere_levels = {}
+        self.previous_spheres = {}
+        self.modelview = np.eye(4, dtype=np.float32)
+        self.focal = 1.0
+        self.detail = 1.0  # < 1 treats everything as smaller on screen (coarser levels)
+
+    def begin_frame(self, screen_height):
+        # Camera transform for this frame and pixels per world unit at depth 1
+        self.modelview = np.asarray(glGetFloatv(GL_MODELVIEW_MATRIX), dtype=np.float32).reshape(4, 4)
+        projection = np.asarray(glGetFloatv(GL_PROJECTION_MATRIX), dtype=np.float32).reshape(4, 4)
+        self.focal = float(projection[1, 1]) * screen_height / 2  # cot(fov / 2) * h / 2
+        self.previous_spheres, self.sphere_levels = self.sphere_levels, {}
+
+    def projected_size(self, centers, radius):
+        eye = centers @ self.modelview[:3, :3] + self.modelview[3, :3]
+        return 2 * radius * self.focal / np.maximum(-eye[:, 2], 0.1)
+
+    def pick(self, pixels, previous):
+        # Go coarser only once clearly below a threshold and finer only once clearly
+        # above it; objects seen for the first time (previous < 0) take the plain level
+        thresholds = np.asarray(LOD_PIXELS, dtype=np.float32)
+        pixels = pixels * self.detail
+        plain = np.sum(pixels[:, None] < thresholds, axis=1)
+        finest = np.sum(pixels[:, None] < thresholds * (1 - LOD_HYSTERESIS), axis=1)
+        coarsest = np.sum(pixels[:, None] < thresholds * (1 + LOD_HYSTERESIS), axis=1)
+        return np.where(previous < 0, plain, np.clip(previous, finest, coarsest))
+
+    def select(self, key, centers, radius, handles):
+        # Per-instance levels for one batch; instances are matched to last frame by
+        # entity handle, so a subset that changes every step (glow, breath) keeps its bands
+        handles = np.asarray(handles, dtype=np.int64)
+        previous = np.full(len(handles), -1, dtype=np.int64)
+        last_handles, last_levels = self.levels.get(key, (np.zeros(0, dtype=np.int64), None))
+        if len(last_handles):
+            at = np.minimum(np.searchsorted(last_handles, handles), len(last_handles) - 1)
+            found = last_handles[at] == handles
+            previous[found] = last_levels[at[found]]
+        levels = self.pick(self.projected_size(centers, radius), previous)
+        order = np.argsort(handles)
+        self.levels[key] = (handles[order], levels[order])
+        return levels
+
+    def draw(self, key, models, offsets, handles, **instance):
+        # Drop instances outside the view, then one InstancedModel draw per level present
+        offsets = np.asarray(offsets, dtype=np.float32).reshape(-1, 3)
+        if len(offsets) == 0:
+            return
+        levels = self.select(key, offsets, models[0].radius, handles)
+        visible = frustum.test(offsets, models[0].radius)
+        for level in np.unique(levels[visible]):
+            mask = visible & (levels == level)
+            attrs = {name: np.asarray(value)[mask] if np.ndim(value) else value
+                     for name, value in instance.items() if value is not None}
+            models[level].draw(offsets[mask], **attrs)
+
+    def sphere_segments(self, key, radius, slices, stacks):
+        # Tessellation for one immediate-mode sphere at the current modelview
+        modelview = np.asarray(glGetFloatv(GL_MODELVIEW_MATRIX), dtype=np.float32).reshape(4, 4)
+        scale = float(np.linalg.norm(modelview[0, :3]))
+        pixels = 2 * radius * scale * self.focal / max(-float(modelview[3, 2]), 0.1)
+        previous = self.previous_spheres.get(key, -1)
+        level = int(self.pick(np.array([pixels], dtype=np.float32), np.array([previous]))[0])
+        self.sphere_levels[key] = level
+        return lod_segments(slices, level), lod_segments(stacks, level)
+
+lod = LodSelector()
+
+# Class untuk renderer shader (GLSL + VBO), alternatif pipeline fixed-function
+class ShaderRenderer:
+    # GLSL 1.20 so it runs on any compatibility context, llvmpipe included.
+    # Lighting is per vertex, the same equation fixed-function GL evaluates for the
+    # two positional lights with GL_COLOR_MATERIAL (ambient + diffuse, no specular
+    # since the material's specular colour is black).
+    VERTEX_SHADER = """
+        #version 120
+        uniform mat4 u_modelview;
+        uniform mat4 u_projection;
+        uniform vec4 u_color;
+        uniform bool u_lit;
+        uniform float u_swing;
+        uniform vec3 u_light_position[2];
+        uniform vec3 u_light_ambient[2];
+        uniform vec3 u_light_diffuse[2];
+        attribute vec3 a_position;
+        attribute vec3 a_normal;
+        attribute vec3 a_color;
+        attribute vec3 a_alt_color;
+        attribute vec3 a_pivot;
+        attribute vec2 a_flags;   // grow, swing
+        attribute vec3 i_offset;
+        attribute vec3 i_params;  // angle (degrees), growth, highlight
+        varying vec4 v_color;
+
+        vec2 rotate(vec2 p, float degrees) {
+            float c = cos(radians(degrees));
+            float s = sin(radians(degrees));
+            return vec2(c * p.x - s * p.y, s * p.x + c * p.y);
+        }
+
+        void main() {
+            vec3 p = a_position;
+            vec3 n = a_normal;
+            if (a_flags.y > 0.5) {
+                p.xy = a_pivot.xy + rotate(p.xy - a_pivot.xy, u_swing);
+                n.xy = rotate(n.xy, u_swing);
+            }
+            if (a_flags.x > 0.5)
+                p = a_pivot + (p - a_pivot) * i_params.y;
+            p.xy = rotate(p.xy, i_params.x);
+            n.xy = rotate(n.xy, i_params.x);
+
+            vec4 eye = u_modelview * vec4(p + i_offset, 1.0);
+            gl_Position = u_projection * eye;
+
+            vec3 base = mix(a_color, a_alt_color, i_params.z) * u_color.rgb;
+            if (!u_lit) {
+                v_color = vec4(base, u_color.a);
+                return;
+            }
+            vec3 normal = normalize(mat3(u_modelview) * n);
+            vec3 light = vec3(0.2) * base;  // GL default light-model ambient
+            for (int i = 0; i < 2; i++) {
+                float diffuse = max(dot(normal, normalize(u_light_position[i] - eye.xyz)), 0.0);
+                light += (u_light_ambient[i] + diffuse * u_light_diffuse[i]) * base;
+            }
+            v_color = vec4(min(light, 1.0), u_color.a);
+        }
+    """
+    FRAGMENT_SHADER = """
+        #version 120
+        varying vec4 v_color;
+
+        void main() {
+            gl_FragColor = v_color;
+        }
+    """
+    # Per-vertex attributes (interleaved in the model VBO), then per-instance ones
+    ATTRIBUTES = (('a_position', 3), ('a_normal', 3), ('a_color', 3), ('a_alt_color', 3),
+                  ('a_pivot', 3), ('a_flags', 2))
+    INSTANCE_ATTRIBUTES = (('i_offset', 3), ('i_params', 3))
+    UNIFORMS = ('u_modelview', 'u_projection', 'u_color', 'u_lit', 'u_swing',
+                'u_light_position', 'u_light_ambient', 'u_light_diffuse')
+
+    def __init__(self):
+        self.enabled = False
+        self.error = None
+        self.program = None
+        self.uniforms = {}
+        self.buffers = {}
+        self.spheres = {}
+        self.instance_vbo = None
+
+    def invalidate(self):
+        # New GL context: program and buffers belong to the old one
+        self.enabled = False
+        self.program = None
+        self.buffers = {}
+        self.instance_vbo = None
+
+    def _compile(self, kind, source):
+        shader = glCreateShader(kind)
+        glShaderSource(shader, source)
+        glCompileShader(shader)
+        if not glGetShaderiv(shader, GL_COMPILE_STATUS):
+            raise RuntimeError(glGetShaderInfoLog(shader).decode(errors='replace'))
+        return shader
+
+    def setup(self):
+        # Build the program for the current context; False (with self.error) if unsupported
+        try:
+            if not (bool(glDrawElementsInstanced) and bool(glVertexAttribDivisor)):
+                raise RuntimeError("glDrawElementsInstanced/glVertexAttribDivisor (GL 3.3) not available")
+            program = glCreateProgram()
+            for kind, source in ((GL_VERTEX_SHADER, self.VERTEX_SHADER), (GL_FRAGMENT_SHADER, self.FRAGMENT_SHADER)):
+                glAttachShader(program, self._compile(kind, source))
+            for index, (name, _) in enumerate(self.ATTRIBUTES + self.INSTANCE_ATTRIBUTES):
+                glBindAttribLocation(program, index, name)
+            glLinkProgram(program)
+            if not glGetProgramiv(program, GL_LINK_STATUS):
+                raise RuntimeError(glGetProgramInfoLog(program).decode(errors='replace'))
+        except Exception as exc:
+            self.error = str(exc).strip()
+            self.enabled = False
+            return False
+        
+        self.program = program
+        self.uniforms = {name: glGetUniformLocation(program, name) for name in self.UNIFORMS}
+        glUseProgram(program)
+        lights = np.array([light[:3] for light in LIGHTS], dtype=np.float32)
+        glUniform3fv(self.uniforms['u_light_position'], 2, lights[:, 0])
+        glUniform3fv(self.uniforms['u_light_ambient'], 2, lights[:, 1])
+        glUniform3fv(self.uniforms['u_light_diffuse'], 2, lights[:, 2])
+        glUseProgram(0)
+        self.instance_vbo = glGenBuffers(1)
+        self.error = None
+        self.enabled = True
+        return True
+
+    def _model_buffers(self, model):
+        # Static per-model vertex and index buffers, uploaded on first use
+        buffers = self.buffers.get(model)
+        if buffers is None:
+            vertices = np.ascontiguousarray(np.column_stack([
+                model.verts, model.normals, model.colors, model.alt_colors, model.pivots,
+                model.grow_mask, model.swing_mask
+            ]), dtype=np.float32)
+            vbo, ibo = glGenBuffers(2)
+            glBindBuffer(GL_ARRAY_BUFFER, vbo)
+            glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL_STATIC_DRAW)
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, ibo)
+            glBufferData(GL_ELEMENT_ARRAY_BUFFER, model.indices.nbytes, model.indices, GL_STATIC_DRAW)
+            buffers = self.buffers[model] = (vbo, ibo, vertices.strides[0])
+        return buffers
+
+    def draw_model(self, model, offsets, angle=None, growth=None, swing=None, highlight=None,
+                   modelview=None, color=(1.0, 1.0, 1.0, 1.0), lit=None):
+        # One instanced draw: the model's mesh stays on the GPU, only 6 floats per instance are sent
+        m = len(offsets)
+        instances = np.zeros((m, 6), dtype=np.float32)
+        instances[:, :3] = offsets
+        instances[:, 3] = 0 if angle is None else angle
+        instances[:, 4] = 1 if growth is None else growth
+        instances[:, 5] = 0 if highlight is None else np.asarray(highlight, dtype=np.float32)
+        if modelview is None:
+            modelview = glGetFloatv(GL_MODELVIEW_MATRIX)
+        vbo, ibo, stride = self._model_buffers(model)
+        
+        glUseProgram(self.program)
+        glUniformMatrix4fv(self.uniforms['u_modelview'], 1, GL_FALSE, np.asarray(modelview, dtype=np.float32))
+        glUniformMatrix4fv(self.uniforms['u_projection'], 1, GL_FALSE,
+                           np.asarray(glGetFloatv(GL_PROJECTION_MATRIX), dtype=np.float32))
+        glUniform4f(self.uniforms['u_color'], *color)
+        glUniform1i(self.uniforms['u_lit'], int(glIsEnabled(GL_LIGHTING) if lit is None else lit))
+        glUniform1f(self.uniforms['u_swing'], 0.0 if swing is None else float(swing))
+        
+        glBindBuffer(GL_ARRAY_BUFFER, vbo)
+        offset = 0
+        for index, (_, size) in enumerate(self.ATTRIBUTES):
+            glEnableVertexAttribArray(index)
+            glVertexAttribPointer(index, size, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(offset))
+            offset += size * 4
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_vbo)
+        glBufferData(GL_ARRAY_BUFFER, instances.nbytes, instances, GL_STREAM_DRAW)
+        offset = 0
+        for index, (_, size) in enumerate(self.INSTANCE_ATTRIBUTES, len(self.ATTRIBUTES)):
+            glEnableVertexAttribArray(index)
+            glVertexAttribPointer(index, size, GL_FLOAT, GL_FALSE, instances.strides[0], ctypes.c_void_p(offset))
+            glVertexAttribDivisor(index, 1)
+            offset += size * 4
+        
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, ibo)
+        glDrawElementsInstanced(GL_TRIANGLES, len(model.indices), GL_UNSIGNED_INT, None, m)
+        profiler.draw_calls += 1
+        
+        for index in range(len(self.ATTRIBUTES) + len(self.INSTANCE_ATTRIBUTES)):
+            glVertexAttribDivisor(index, 0)
+            glDisableVertexAttribArray(index)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glUseProgram(0)
+
+    def draw_sphere(self, radius, slices, stacks):
+        # Immediate-mode sphere replacement: takes the matrix stack, current colour and
+        # lighting switch exactly as glCallList would
+        sphere = self.spheres.get((slices, stacks))
+        if sphere is None:
+            builder = ModelBuilder()
+            builder.add(sphere_mesh(slices, stacks), (1.0, 1.0, 1.0))
+            sphere = self.spheres[(slices, stacks)] = builder.build()
+        modelview = np.array(glGetFloatv(GL_MODELVIEW_MATRIX), dtype=np.float32).reshape(4, 4)
+        modelview[:3] *= radius
+        self.draw_model(sphere, np.zeros((1, 3), dtype=np.float32), modelview=modelview,
+                        color=tuple(glGetFloatv(GL_CURRENT_COLOR)))
+
+shader_renderer = ShaderRenderer()
+
+# Class untuk cache tekstur teks (LRU)
+class TextCache:
+    def __init__(self, capacity=128):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.pinned = set()  # keys a compiled display list still binds by texture name
+
+    def get(self, text, font, color):
+        key = (text, font, color)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            return entry
+
+        text_surface = font.render(text, True, color)
+        text_data = pygame.image.tostring(text_surface, "RGBA", False)
+        texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, texture)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, text_surface.get_width(), text_surface.get_height(),
+                     0, GL_RGBA, GL_UNSIGNED_BYTE, text_data)
+        entry = (texture, text_surface.get_width(), text_surface.get_height())
+        self.entries[key] = entry
+
+        while len(self.entries) > self.capacity:
+            old = next((old for old in self.entries if old not in self.pinned), None)
+            if old is None:
+                break
+            old_texture, _, _ = self.entries.pop(old)
+            glDeleteTextures([old_texture])
+        return entry
+
+    def pin(self, keys):
+        # Replaces the pinned set; pinned entries are never evicted
+        self.pinned = set(keys)
+
+    def invalidate(self):
+        self.entries.clear()
+        self.pinned = set()
+
+    def draw(self, text, x, y, font, color):
+        # Same placement as glRasterPos2f + glDrawPixels: (x, y) is the bottom-left corner
+        texture, w, h = self.get(text, font, color)
+        glEnable(GL_TEXTURE_2D)
+        glBindTexture(GL_TEXTURE_2D, texture)
+        glColor4f(1, 1, 1, 1)
+        glBegin(GL_QUADS)
+        glTexCoord2f(0, 0)
+        glVertex2f(x, y - h)
+        glTexCoord2f(1, 0)
+        glVertex2f(x + w, y - h)
+        glTexCoord2f(1, 1)
+        glVertex2f(x + w, y)
+        glTexCoord2f(0, 1)
+        glVertex2f(x, y)
+        glEnd()
+        glDisable(GL_TEXTURE_2D)
+
+text_cache = TextCache()
+
+# Class untuk tanah dan rumput statis (dibake ke satu vertex buffer)
+class GrassField:
+    def __init__(self, blades=GRASS_BLADES):
+        self.blades = blades
+        self.vertices = np.zeros((0, 6), dtype=np.float32)
+        self.vbo = None
+        self.dirty = True
+
+    def build(self, seed=GRASS_SEED):
+        rng = np.random.default_rng(seed)
+        
+        # Ground plane, as two triangles
+        ground = np.array([
+            [-12, -2.2, -12], [12, -2.2, -12], [12, -2.2, 12],
+            [-12, -2.2, -12], [12, -2.2, 12], [-12, -2.2, 12]
+        ], dtype=np.float32)
+        
+        # Grass blades: same triangle as before, scattered with random yaw and height
+        n = self.blades
+        base = rng.uniform(-10, 10, (n, 2)).astype(np.float32)
+        yaw = rng.uniform(0, math.pi, n).astype(np.float32)
+        height = rng.uniform(0.07, 0.14, n).astype(np.float32)
+        shape = np.array([[0.0, 0.0], [0.05, 1.0], [0.1, 0.0]], dtype=np.float32)
+        along = shape[None, :, 0]
+        blades = np.empty((n, 3, 3), dtype=np.float32)
+        blades[:, :, 0] = base[:, 0:1] + along * np.cos(yaw)[:, None]
+        blades[:, :, 1] = -2.2 + shape[None, :, 1] * height[:, None]
+        blades[:, :, 2] = base[:, 1:2] + along * np.sin(yaw)[:, None]
+        
+        shade = rng.uniform(0.9, 1.1, (n, 1, 1)).astype(np.float32)
+        blade_colors = np.clip(np.array([0.35, 0.70, 0.30], dtype=np.float32) * shade, 0, 1)
+        
+        vertices = np.empty((6 + n * 3, 6), dtype=np.float32)
+        vertices[:6, :3] = ground
+        vertices[:6, 3:] = (0.4, 0.75, 0.35)
+        vertices[6:, :3] = blades.reshape(-1, 3)
+        vertices[6:, 3:] = np.broadcast_to(blade_colors, (n, 3, 3)).reshape(-1, 3)
+        self.vertices = vertices
+        self.dirty = True
+
+    def invalidate(self):
+        self.vbo = None
+        self.dirty = True
+
+    def draw(self):
+        if self.vbo is None:
+            self.vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        if self.dirty:
+            glBufferData(GL_ARRAY_BUFFER, self.vertices.nbytes, self.vertices, GL_STATIC_DRAW)
+            self.dirty = False
+        
+        stride = self.vertices.strides[0]
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_COLOR_ARRAY)
+        glVertexPointer(3, GL_FLOAT, stride, ctypes.c_void_p(0))
+        glColorPointer(3, GL_FLOAT, stride, ctypes.c_void_p(12))
+        glDrawArrays(GL_TRIANGLES, 0, len(self.vertices))
+        profiler.draw_calls += 1
+        glDisableClientState(GL_COLOR_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+# Class untuk buffer partikel CO2 (struct-of-arrays)
+class ParticleBuffer:
+    FIELDS = ('pos', 'prev_pos', 'velocity', 'size', 'lifetime', 'age', 'float_offset')
+
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self.count = 0
+        self.pos = np.zeros((capacity, 3), dtype=np.float32)
+        self.prev_pos = np.zeros((capacity, 3), dtype=np.float32)
+        self.velocity = np.zeros((capacity, 3), dtype=np.float32)
+        self.size = np.zeros(capacity, dtype=np.float32)
+        self.lifetime = np.zeros(capacity, dtype=np.float32)
+        self.age = np.zeros(capacity, dtype=np.float32)
+        self.float_offset = np.zeros(capacity, dtype=np.float32)
+
+    def __len__(self):
+        return self.count
+
+    def _arrays(self):
+        return [getattr(self, name) for name in self.FIELDS]
+
+    def _grow(self, needed):
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        for name in self.FIELDS:
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+        self.capacity = capacity
+
+    def spawn(self, positions, rng):
+        positions = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+        n = len(positions)
+        if n == 0:
+            return
+        if self.count + n > self.capacity:
+            self._grow(self.count + n)
+        s = slice(self.count, self.count + n)
+        self.pos[s] = positions
+        self.prev_pos[s] = positions
+        self.velocity[s, 0] = rng.uniform(-0.03, 0.03, n)
+        self.velocity[s, 1] = rng.uniform(0.01, 0.04, n)
+        self.velocity[s, 2] = rng.uniform(-0.03, 0.03, n)
+        self.size[s] = rng.uniform(0.06, 0.12, n)
+        self.lifetime[s] = rng.uniform(4, 8, n)
+        self.age[s] = 0
+        self.float_offset[s] = rng.uniform(0, 2 * math.pi, n)
+        self.count += n
+
+    def update(self, dt, time):
+        n = self.count
+        pos = self.pos[:n]
+        vel = self.velocity[:n]
+        self.prev_pos[:n] = pos
+        self.age[:n] += dt
+
+        # Float movement (velocities are per 1/FPS frame, scale them to dt)
+        frames = dt * FPS
+        phase = time + self.float_offset[:n]
+        pos[:, 0] += (vel[:, 0] + np.sin(phase) * 0.01) * frames
+        pos[:, 1] += vel[:, 1] * 0.3 * frames
+        pos[:, 2] += (vel[:, 2] + np.cos(phase) * 0.01) * frames
+
+        # Boundary check (wrapped particles must not be interpolated across the jump)
+        wrapped = pos[:, 1] > 4
+        pos[wrapped, 1] = -2
+        self.prev_pos[:n][wrapped] = pos[wrapped]
+        vel[np.abs(pos[:, 0]) > 6, 0] *= -1
+        vel[np.abs(pos[:, 2]) > 6, 2] *= -1
+
+        # Expire old particles
+        self.keep(self.age[:n] < self.lifetime[:n])
+
+    def keep(self, mask):
+        # Compact surviving slots to the front, preserving order
+        if mask.all():
+            return
+        idx = np.flatnonzero(mask)
+        k = len(idx)
+        for arr in self._arrays():
+            arr[:k] = arr[idx]
+        self.count = k
+
+    def clear(self):
+        self.count = 0
+
+    def state(self):
+        return {name: getattr(self, name)[:self.count] for name in self.FIELDS}
+
+    def restore(self, arrays):
+        n = len(arrays['pos'])
+        self.count = 0
+        if n > self.capacity:
+            self._grow(n)
+        for name in self.FIELDS:
+            getattr(self, name)[:n] = arrays[name]
+        self.count = n
+
+    def sprites(self, alpha=1.0):
+        n = self.count
+        return co2_sprites(self.prev_pos[:n], self.pos[:n], self.size[:n], self.float_offset[:n], alpha)
+
+def co2_sprites(prev_pos, pos, size, float_offset, alpha=1.0):
+    # Glow layer and main particle, as (positions, sizes, rgba, keys), interpolated
+    # alpha of the way from the previous step to the current one. The key is the
+    # particle's random float phase, shared by its glow and core.
+    n = len(pos)
+    pos = prev_pos + (pos - prev_pos) * np.float32(alpha)
+    glow = np.tile(np.array([0.3, 0.5, 0.9, 0.25], dtype=np.float32), (n, 1))
+    core = np.tile(np.array([0.4, 0.65, 1.0, 0.8], dtype=np.float32), (n, 1))
+    keys = (float_offset / np.float32(2 * math.pi)).astype(np.float32)
+    return (np.concatenate([pos, pos]),
+            np.concatenate([size * 1.8, size]),
+            np.concatenate([glow, core]),
+            np.concatenate([keys, keys]))
+
+# Class untuk batch renderer partikel (billboard dengan falloff radial)
+class ParticleRenderer:
+    TEXTURE_SIZE = 64
+    CORNERS = np.array([[-1, -1], [1, -1], [1, 1], [-1, 1]], dtype=np.float32)
+
+    def __init__(self):
+        self.texture = None
+        self.batches = []
+        self.limit = None  # sprite cap from the quality tier
+
+    def invalidate(self):
+        self.texture = None
+
+    def _build_texture(self):
+        n = self.TEXTURE_SIZE
+        axis = (np.arange(n, dtype=np.float32) + 0.5) / n * 2 - 1
+        r2 = axis[None, :] ** 2 + axis[:, None] ** 2
+        alpha = np.clip(1.0 - r2, 0.0, 1.0) ** 0.75
+        pixels = np.empty((n, n, 4), dtype=np.uint8)
+        pixels[..., :3] = 255
+        pixels[..., 3] = (alpha * 255).astype(np.uint8)
+
+        self.texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, n, n, 0, GL_RGBA, GL_UNSIGNED_BYTE, pixels)
+
+    def add(self, positions, sizes, colors, keys):
+        # keys: stable per-sprite value in [0, 1) that decides who goes first under the cap
+        if len(positions):
+            self.batches.append((positions, sizes, colors, keys))
+
+    def flush(self):
+        # All queued particles of every kind go out in one draw call
+        batches, self.batches = self.batches, []
+        if not batches:
+            return
+        positions = np.concatenate([b[0] for b in batches]).astype(np.float32)
+        sizes = np.concatenate([b[1] for b in batches]).astype(np.float32)
+        colors = np.concatenate([b[2] for b in batches]).astype(np.float32)
+        keys = np.concatenate([b[3] for b in batches])
+        
+        # Quads reach size * sqrt(2) from their centre
+        visible = frustum.test(positions, sizes * 1.415)
+        if not visible.all():
+            positions, sizes, colors, keys = positions[visible], sizes[visible], colors[visible], keys[visible]
+        if self.limit is not None and len(positions) > self.limit:
+            # Over the cap: keep the lowest keys. A particle keeps its key for life, so the
+            # same ones stay on screen step to step, and a glow never loses its core.
+            threshold = np.partition(keys, self.limit)[self.limit]
+            keep = keys < threshold
+            positions, sizes, colors = positions[keep], sizes[keep], colors[keep]
+        n = len(positions)
+        if n == 0:
+            return
+
+        # Camera right/up vectors are the rows of the modelview rotation
+        modelview = np.asarray(glGetFloatv(GL_MODELVIEW_MATRIX), dtype=np.float32).reshape(4, 4)
+        right = modelview[:3, 0]
+        up = modelview[:3, 1]
+        offsets = self.CORNERS[:, 0:1] * right + self.CORNERS[:, 1:2] * up
+        verts = positions[:, None, :] + offsets[None, :, :] * sizes[:, None, None]
+        texcoords = np.tile((self.CORNERS + 1) * 0.5, (n, 1))
+
+        if self.texture is None:
+            self._build_texture()
+
+        glDisable(GL_LIGHTING)
+        glDepthMask(GL_FALSE)
+        glEnable(GL_TEXTURE_2D)
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glTexEnvi(GL_TEXTURE_ENV, GL_TEXTURE_ENV_MODE, GL_MODULATE)
+
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_COLOR_ARRAY)
+        glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+        glVertexPointer(3, GL_FLOAT, 0, np.ascontiguousarray(verts))
+        glColorPointer(4, GL_FLOAT, 0, np.ascontiguousarray(np.repeat(colors, 4, axis=0)))
+        glTexCoordPointer(2, GL_FLOAT, 0, np.ascontiguousarray(texcoords))
+        glDrawArrays(GL_QUADS, 0, n * 4)
+        profiler.draw_calls += 1
+        glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+        glDisableClientState(GL_COLOR_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+
+        glDisable(GL_TEXTURE_2D)
+        glDepthMask(GL_TRUE)
+        glEnable(GL_LIGHTING)
+
+particle_renderer = ParticleRenderer()
+
+# Class untuk pool emitter bersama (asap pabrik + knalpot mobil)
+class EmitterPool:
+    SMOKE, EXHAUST = 0, 1
+    FIELDS = ('pos', 'size', 'life', 'kind', 'key')
+    GOLDEN = 0.6180339887498949
+    # Per kind: drift per frame, jitter range per frame, size growth per frame,
+    # start size, lifetime, colour and peak alpha
+    DRIFT = np.array([[0.0, 0.025, 0.0], [0.025, 0.0, 0.0]], dtype=np.float32)
+    JITTER_LO = np.array([[-0.015, 0.0, -0.01], [0.0, -0.008, -0.005]], dtype=np.float32)
+    JITTER_SPAN = np.array([[0.03, 0.0, 0.02], [0.0, 0.020, 0.010]], dtype=np.float32)
+    GROWTH = np.array([0.012, 0.0], dtype=np.float32)
+    START_SIZE = np.array([0.12, 0.10], dtype=np.float32)
+    LIFETIME = np.array([2.5, 1.8], dtype=np.float32)
+    COLOR = np.array([[0.65, 0.65, 0.68, 0.6], [0.5, 0.5, 0.52, 0.65]], dtype=np.float32)
+
+    def __init__(self, capacity=EMITTER_CAPACITY):
+        # Live puffs are packed at the front in emission order, oldest first
+        self.capacity = capacity
+        self.count = 0
+        self.pos = np.zeros((capacity, 3), dtype=np.float32)
+        self.size = np.zeros(capacity, dtype=np.float32)
+        self.life = np.zeros(capacity, dtype=np.float32)
+        self.kind = np.zeros(capacity, dtype=np.uint8)
+        # Sprite-cap key per puff: golden-ratio sequence over the emission serial,
+        # spread evenly over [0, 1) without touching the simulation rng
+        self.key = np.zeros(capacity, dtype=np.float32)
+        self.emitted = 0
+
+    def __len__(self):
+        return self.count
+
+    def count_kind(self, kind):
+        return int(np.count_nonzero(self.kind[:self.count] == kind))
+
+    def emit(self, kind, positions, age=0.0):
+        # age: seconds each puff has already been drifting (puffs a long step emitted
+        # before its end), applied like update() would without the jitter
+        positions = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+        age = np.broadcast_to(np.asarray(age, dtype=np.float32), len(positions))[-self.capacity:]
+        positions = positions[-self.capacity:]
+        n = len(positions)
+        overflow = self.count + n - self.capacity
+        if overflow > 0:
+            # Evict the oldest puffs first
+            for name in self.FIELDS:
+                arr = getattr(self, name)
+                arr[:self.count - overflow] = arr[overflow:self.count]
+            self.count -= overflow
+        s = slice(self.count, self.count + n)
+        frames = age * FPS
+        self.pos[s] = positions + self.DRIFT[kind] * frames[:, None]
+        self.size[s] = self.START_SIZE[kind] + self.GROWTH[kind] * frames
+        self.life[s] = self.LIFETIME[kind] - age
+        self.kind[s] = kind
+        self.key[s] = np.arange(self.emitted, self.emitted + n) * self.GOLDEN % 1.0
+        self.emitted += n
+        self.count += n
+
+    def update(self, dt, rng):
+        # Drop expired puffs, then age, drift and grow the rest in one pass
+        n = self.count
+        alive = self.life[:n] > 0
+        if not alive.all():
+            idx = np.flatnonzero(alive)
+            for name in self.FIELDS:
+                arr = getattr(self, name)
+                arr[:len(idx)] = arr[idx]
+            n = self.count = len(idx)
+        
+        kind = self.kind[:n]
+        frames = dt * FPS
+        jitter = self.JITTER_LO[kind] + rng.random((n, 3), dtype=np.float32) * self.JITTER_SPAN[kind]
+        self.pos[:n] += (self.DRIFT[kind] + jitter) * frames
+        self.size[:n] += self.GROWTH[kind] * frames
+        self.life[:n] -= dt
+
+    def clear(self):
+        self.count = 0
+
+    def state(self):
+        state = {name: getattr(self, name)[:self.count] for name in self.FIELDS}
+        state['emitted'] = np.array(self.emitted)
+        return state
+
+    def restore(self, arrays):
+        # Keep the newest puffs if the snapshot came from a larger pool;
+        # snapshots without sprite keys get fresh ones
+        n = min(len(arrays['pos']), self.capacity)
+        self.emitted = int(arrays.get('emitted', 0))
+        for name in self.FIELDS:
+            if name in arrays:
+                getattr(self, name)[:n] = arrays[name][-n:] if n else arrays[name][:0]
+        if 'key' not in arrays:
+            self.key[:n] = np.arange(n) * self.GOLDEN % 1.0
+        self.count = n
+
+    def sprites(self):
+        n = self.count
+        kind = self.kind[:n]
+        colors = self.COLOR[kind]
+        colors[:, 3] *= self.life[:n] / self.LIFETIME[kind]
+        return self.pos[:n], self.size[:n], colors, self.key[:n]
+
+# Class untuk spatial index (uniform grid) partikel
+class SpatialGrid:
+    OFFSET = 1 << 20
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.axes = np.zeros((3, 0), dtype=np.float32)
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.order = np.zeros(0, dtype=np.int64)
+        self._neighbours = {}
+
+    def _cells(self, points):
+        return np.floor(np.asarray(points) / self.cell_size).astype(np.int64) + self.OFFSET
+
+    @staticmethod
+    def _keys(cells):
+        return (cells[..., 0] << 42) | (cells[..., 1] << 21) | cells[..., 2]
+
+    def build(self, points):
+        points = np.asarray(points)
+        keys = self._keys(self._cells(points))
+        self.order = np.argsort(keys)  # order within a cell is irrelevant to pairs()
+        self.keys = keys[self.order]
+        # x, y, z rows in cell order: candidate gathers become 1-D takes over mostly
+        # contiguous runs instead of scattered (n, 3) row lookups
+        self.axes = np.ascontiguousarray(points[self.order].T)
+
+    def _offsets(self, radius):
+        reach = int(math.ceil(radius / self.cell_size))
+        if reach not in self._neighbours:
+            span = np.arange(-reach, reach + 1)
+            self._neighbours[reach] = np.stack(np.meshgrid(span, span, span, indexing='ij'), axis=-1).reshape(-1, 3)
+        return self._neighbours[reach]
+
+    def pairs(self, points, radius):
+        # Every (query index, point index) pair closer than radius, for all queries at once
+        points = np.asarray(points, dtype=self.axes.dtype).reshape(-1, 3)
+        offsets = self._offsets(radius)
+        keys = self._keys(self._cells(points)[:, None, :] + offsets[None, :, :]).ravel()
+        lo = np.searchsorted(self.keys, keys, side='left')
+        counts = np.searchsorted(self.keys, keys, side='right') - lo
+        total = int(counts.sum())
+        query = np.repeat(np.arange(len(points)).repeat(len(offsets)), counts)
+        within = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        slots = np.repeat(lo, counts) + within  # positions in cell order
+        distance = np.zeros(total, dtype=self.axes.dtype)
+        for coords, centers in zip(self.axes, points.T):
+            d = coords.take(slots) - centers.take(query)
+            distance += d * d
+        close = distance < radius * radius
+        return query[close], self.order[slots[close]]
+
+# Fungsi helper untuk penempatan objek massal (ring, jittered grid, Poisson-disk)
+def keep_apart(spots, occupied, min_distance):
+    # Drop (x, z) spots closer than min_distance to an occupied spot or to an earlier kept spot
+    def ground(xz):
+        return np.column_stack([xz[:, 0], np.zeros(len(xz)), xz[:, 1]])
+    
+    grid = SpatialGrid(min_distance)
+    if len(occupied):
+        grid.build(ground(occupied))
+        query, _ = grid.pairs(ground(spots), min_distance)
+        spots = np.delete(spots, np.unique(query), axis=0)
+    grid.build(ground(spots))
+    query, other = grid.pairs(ground(spots), min_distance)
+    earlier = other < query
+    query, other = query[earlier], other[earlier]
+    
+    # Greedy in spot order, in vectorized rounds: a spot is dropped once an earlier
+    # neighbour is kept, and kept once all its earlier neighbours are dropped
+    KEPT, DROPPED = 1, -1
+    state = np.zeros(len(spots), dtype=np.int8)
+    while True:
+        blocked = np.zeros(len(spots), dtype=bool)
+        blocked[query[state[other] == KEPT]] = True
+        waiting = np.zeros(len(spots), dtype=bool)
+        waiting[query[state[other] == 0]] = True
+        open_spots = state == 0
+        state[open_spots & blocked] = DROPPED
+        state[open_spots & ~blocked & ~waiting] = KEPT
+        if not (state == 0).any():
+            break
+        pending = state[query] == 0
+        query, other = query[pending], other[pending]
+    return spots[state == KEPT]
+
+def layout_positions(rng, count, layout='ring', radius=BULK_RADIUS, min_distance=None, occupied=None):
+    # (n, 2) ground spots for up to `count` new objects. With a min_distance, spots
+    # that would overlap are dropped, so a full area returns fewer than `count`.
+    if layout == 'poisson' and min_distance is None:
+        min_distance = BULK_MIN_DISTANCE
+    occupied = np.zeros((0, 2)) if occupied is None else np.asarray(occupied, dtype=np.float64).reshape(-1, 2)
+    
+    if layout == 'grid':
+        # One jittered spot per cell, in randomly chosen cells of the annulus
+        cell = math.sqrt(math.pi * (radius ** 2 - BULK_INNER_RADIUS ** 2) / max(count, 1))
+        while True:
+            axis = np.arange(-radius + cell / 2, radius, cell)
+            centers = np.stack(np.meshgrid(axis, axis), axis=-1).reshape(-1, 2)
+            distance = np.hypot(centers[:, 0], centers[:, 1])
+            centers = centers[(distance >= BULK_INNER_RADIUS) & (distance <= radius)]
+            if len(centers) >= count:
+                break
+            cell *= 0.9
+        picked = centers[rng.choice(len(centers), count, replace=False)]
+        spots = picked + rng.uniform(-0.35, 0.35, (count, 2)) * cell
+        return spots if min_distance is None else keep_apart(spots, occupied, min_distance)
+    
+    inner, outer = (3.5, 5.5) if layout == 'ring' else (BULK_INNER_RADIUS, radius)
+    
+    def draw(k):
+        # Uniform over the annulus area ('ring' keeps its uniform radius)
+        angle = rng.uniform(0, 2 * np.pi, k)
+        if layout == 'ring':
+            distance = rng.uniform(inner, outer, k)
+        else:
+            distance = np.sqrt(rng.uniform(inner ** 2, outer ** 2, k))
+        return np.column_stack([distance * np.cos(angle), distance * np.sin(angle)])
+    
+    if min_distance is None:
+        return draw(count)
+    
+    # Dart throwing in vectorized rounds. Darts are sized to the free area: the first
+    # round guesses the acceptance from how much of the annulus the occupied spots
+    # cover, later rounds use the acceptance actually seen. More than ~6 darts per
+    # exclusion disc would only be thinned by keep_apart, so that caps a round.
+    area = math.pi * (outer ** 2 - inner ** 2)
+    disc = math.pi * min_distance ** 2
+    ring = np.hypot(occupied[:, 0], occupied[:, 1])
+    nearby = np.count_nonzero((ring > inner - min_distance) & (ring < outer + min_distance))
+    acceptance = math.exp(-nearby * disc / area)
+    most = max(BULK_MIN_DARTS, int(6 * area / disc))
+    placed = np.zeros((0, 2))
+    for _ in range(BULK_ROUNDS):
+        needed = count - len(placed)
+        if needed <= 0:
+            break
+        darts = min(most, max(BULK_MIN_DARTS, int(math.ceil(needed / max(acceptance, 0.01)))))
+        batch = keep_apart(draw(darts), np.concatenate([occupied, placed]), min_distance)
+        placed = np.concatenate([placed, batch[:needed]])
+        if len(batch) <= darts // 200:
+            break  # (almost) nothing fits any more
+        acceptance = len(batch) / darts
+    return placed
+
+def fill_spacing(count, existing, radius=BULK_RADIUS):
+    # Poisson spacing that still fits `count` more objects next to `existing` ones,
+    # so repeated keypress batches keep placing in full instead of stalling at BULK_MIN_DISTANCE
+    area = math.pi * (radius ** 2 - BULK_INNER_RADIUS ** 2)
+    return min(BULK_MIN_DISTANCE, BULK_FILL_SPACING * math.sqrt(area / (existing + count)))
+
+# Class untuk tabel komponen entitas (struct-of-arrays dengan handle stabil)
+class EntityTable:
+    # One array per component, live rows packed at the front. Every row has a
+    # handle that is never reused; handle -> row survives adds and removes
+    # (removal compacts the survivors in order and renumbers their rows).
+    def __init__(self, components, capacity=16):
+        # components: (name, dtype, shape, default) per column
+        self.components = components
+        self.names = tuple(name for name, _, _, _ in components)
+        self.capacity = capacity
+        self.count = 0
+        self.columns = {name: np.full((capacity,) + shape, default, dtype=dtype)
+                        for name, dtype, shape, default in components}
+        self.handles = np.zeros(capacity, dtype=np.int64)  # row -> handle
+        self.rows = np.zeros(0, dtype=np.int64)            # handle -> row, -1 once removed
+        self.next_handle = 0
+    
+    def __len__(self):
+        return self.count
+    
+    def __getitem__(self, name):
+        # Live view of one component (or of the handles, like state() has them)
+        if name == 'handle':
+            return self.handles[:self.count]
+        return self.columns[name][:self.count]
+    
+    def _grow(self, needed):
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        for name, dtype, shape, default in self.components:
+            column = np.full((capacity,) + shape, default, dtype=dtype)
+            column[:self.count] = self.columns[name][:self.count]
+            self.columns[name] = column
+        handles = np.zeros(capacity, dtype=np.int64)
+        handles[:self.count] = self.handles[:self.count]
+        self.handles = handles
+        self.capacity = capacity
+    
+    def add(self, count, handles=None, **values):
+        # `count` new rows; each value broadcasts over them, missing components take
+        # their default. Returns the new handles.
+        unknown = set(values) - set(self.names)
+        if unknown:
+            raise ValueError(f"unknown components: {', '.join(sorted(unknown))}")
+        if self.count + count > self.capacity:
+            self._grow(self.count + count)
+        rows = np.arange(self.count, self.count + count)
+        for name, _, _, default in self.components:
+            self.columns[name][rows] = values.get(name, default)
+        
+        if handles is None:
+            handles = np.arange(self.next_handle, self.next_handle + count)
+        handles = np.asarray(handles, dtype=np.int64)
+        if count:
+            self.next_handle = max(self.next_handle, int(handles.max()) + 1)
+        if self.next_handle > len(self.rows):
+            grown = np.full(max(self.next_handle, 2 * len(self.rows)), -1, dtype=np.int64)
+            grown[:len(self.rows)] = self.rows
+            self.rows = grown
+        self.rows[handles] = rows
+        self.handles[rows] = handles
+        self.count += count
+        return handles
+    
+    def remove(self, handles):
+        handles = np.atleast_1d(np.asarray(handles, dtype=np.int64))
+        removed = np.array([self.row(handle) for handle in handles], dtype=np.int64)
+        keep = np.ones(self.count, dtype=bool)
+        keep[removed] = False
+        n = int(np.count_nonzero(keep))
+        for name in self.names:
+            column = self.columns[name]
+            column[:n] = column[:self.count][keep]
+        self.handles[:n] = self.handles[:self.count][keep]
+        self.rows[handles] = -1
+        self.count = n
+        self.rows[self.handles[:n]] = np.arange(n)
+    
+    def row(self, handle):
+        row = int(self.rows[handle]) if 0 <= handle < len(self.rows) else -1
+        if row < 0:
+            raise KeyError(f"no entity with handle {handle}")
+        return row
+    
+    def clear(self):
+        # Handles are not reused after a clear either
+        self.rows[:] = -1
+        self.count = 0
+    
+    def state(self):
+        # Copies of the live rows, one array per component plus the handles
+        columns = {name: self.columns[name][:self.count].copy() for name in self.names}
+        columns['handle'] = self.handles[:self.count].copy()
+        return columns
+    
+    def restore(self, columns):
+        # Snapshots without a handle column get fresh handles
+        self.clear()
+        count = len(columns[self.names[0]])
+        self.add(count, handles=columns.get('handle'),
+                 **{name: np.reshape(columns[name], (count,) + shape) for name, _, shape, _ in self.components})
+
+# Fungsi helper untuk emisi periodik (asap pabrik, knalpot mobil)
+def periodic_emissions(due, timers, period):
+    # Rows whose timer ran past `period`, repeated once per whole period it covers
+    # (a long step can span several), oldest first, with the age each emission has
+    # reached by the end of the step: 0 for the newest, one period more per step back
+    rounds = np.maximum((timers // period).astype(np.int64), 1)
+    rows = np.repeat(due, rounds)
+    newest = np.repeat(np.cumsum(rounds) - 1, rounds)
+    return rows, (newest - np.arange(len(rows))) * period
+
+# Class untuk Tree
+class Tree:
+    COMPONENTS = (
+        ('pos', np.float64, (3,), 0.0),
+        ('sway', np.float64, (), 0.0),
+        ('absorbing', bool, (), False),
+        ('absorb_timer', np.float64, (), 0.0),
+        ('growth', np.float64, (), 1.0),
+    )
+    
+    @staticmethod
+    def update(trees, dt, time):
+        x = trees['pos'][:, 0]
+        trees['sway'][:] = np.sin(time * 2 + x) * 0.08
+        timer = trees['absorb_timer']
+        timer -= dt
+        trees['absorbing'][timer <= 0] = False
+        
+        # Gentle breathing animation
+        trees['growth'][:] = 1.0 + np.sin(time * 1.5 + x) * 0.05
+    
+    @staticmethod
+    def absorb_co2(trees, rows):
+        trees['absorbing'][rows] = True
+        trees['absorb_timer'][rows] = 1.2
+        
+    @staticmethod
+    def build_model(level=0):
+        model = ModelBuilder()
+        
+        # Trunk
+        model.add(cube_mesh(), (0.45, 0.30, 0.15), translate=(0, -0.3, 0), scale=(0.18, 0.7, 0.18))
+        
+        # Leaves - main (bright green when absorbing)
+        segments = lod_segments(16, level)
+        model.add(sphere_mesh(segments, segments), (0.15, 0.60, 0.20), translate=(0, 0.35, 0), scale=0.55,
+                  grow=True, highlight=(0.1, 1.0, 0.4))
+        
+        # Side leaves
+        segments = lod_segments(14, level)
+        for x in [-0.35, 0.35]:
+            model.add(sphere_mesh(segments, segments), (0.25, 0.75, 0.30), translate=(x, 0.20, 0), scale=0.38, grow=True)
+        return model.build()
+    
+    @staticmethod
+    def build_glow(level=0):
+        # Translucent shell around the leaves while absorbing
+        segments = lod_segments(16, level)
+        model = ModelBuilder()
+        model.add(sphere_mesh(segments, segments), (0.2, 1.0, 0.3), translate=(0, 0.35, 0), scale=0.75)
+        return model.build(alpha=0.4)
+    
+    @classmethod
+    def draw_batch(cls, trees):
+        # trees: Tree columns (EntityTable.state() or live views)
+        lod.draw(
+            'tree', cls.models, trees['pos'], trees['handle'],
+            angle=trees['sway'] * 8,
+            growth=trees['growth'],
+            highlight=trees['absorbing']
+        )
+        
+        # Glow effect when absorbing
+        absorbing = np.asarray(trees['absorbing'], dtype=bool)
+        if absorbing.any():
+            lod.draw('tree-glow', cls.glow_models, trees['pos'][absorbing], trees['handle'][absorbing],
+                     angle=trees['sway'][absorbing] * 8)
+
+# Class untuk Factory
+class Factory:
+    COMPONENTS = (
+        ('pos', np.float64, (3,), 0.0),
+        ('smoke_timer', np.float64, (), 0.0),
+    )
+    CHIMNEYS = np.array([[-0.2, 0.9, 0.0], [0.2, 0.9, 0.0]])
+    SMOKE_PERIOD = 0.15
+    
+    @staticmethod
+    def update(factories, dt):
+        factories['smoke_timer'][:] += dt
+    
+    @classmethod
+    def emit_smoke(cls, factories, emitters):
+        timer = factories['smoke_timer']
+        due = np.flatnonzero(timer > cls.SMOKE_PERIOD)
+        if len(due):
+            rows, age = periodic_emissions(due, timer[due], cls.SMOKE_PERIOD)
+            timer[due] = 0
+            emitters.emit(EmitterPool.SMOKE, factories['pos'][rows, None, :] + cls.CHIMNEYS,
+                          np.repeat(age, len(cls.CHIMNEYS)))
+    
+    @staticmethod
+    def build_model(level=0):
+        model = ModelBuilder()
+        cube = cube_mesh()
+        
+        # Building
+        model.add(cube, (0.21, 0.36, 0.45), scale=(0.9, 0.7, 0.7))
+        
+        # Windows (dropped from the distant proxy)
+        if level < LOD_LEVELS - 1:
+            for i in range(-1, 2):
+                for j in range(2):
+                    model.add(cube, (0.70, 0.90, 1.00), translate=(i * 0.28, -0.1 + j * 0.28, 0.36), scale=(0.16, 0.16, 0.01))
+        
+        # Chimneys
+        model.add(cube, (0.25, 0.28, 0.32), translate=(-0.2, 0.6, 0), scale=(0.16, 0.5, 0.16))
+        model.add(cube, (0.25, 0.28, 0.32), translate=(0.2, 0.7, 0), scale=(0.16, 0.6, 0.16))
+        return model.build()
+    
+    @classmethod
+    def draw_batch(cls, factories):
+        lod.draw('factory', cls.models, factories['pos'], factories['handle'])
+    
+# Class untuk Cow
+class Cow:
+    COMPONENTS = (
+        ('pos', np.float64, (3,), 0.0),
+        ('breath_timer', np.float64, (), 0.0),
+        ('breathing', bool, (), False),
+        ('walk_offset', np.float64, (), 0.0),
+    )
+    
+    @staticmethod
+    def update(cows, dt):
+        timer = cows['breath_timer']
+        timer += dt
+        cows['breathing'][:] = timer > 2.5
+        timer[timer > 3.0] = 0
+    
+    @staticmethod
+    def build_model(level=0):
+        model = ModelBuilder()
+        cube = cube_mesh()
+        
+        # Body
+        model.add(cube, (0.255, 0.252, 0.247), scale=(0.55, 0.35, 0.35))
+        
+        # Head
+        model.add(cube, (0.255, 0.252, 0.247), translate=(-0.38, 0.05, 0), scale=(0.28, 0.23, 0.23))
+        
+        # Legs
+        for i in [-0.18, -0.06, 0.06, 0.18]:
+            model.add(cube, (0.95, 0.95, 0.95), translate=(i, -0.28, 0), scale=(0.07, 0.24, 0.07))
+        if level == LOD_LEVELS - 1:
+            # Distant proxy: body, head and legs only
+            return model.build()
+        
+        # Ears
+        for z in [0.13, -0.13]:
+            model.add(cube, (1.0, 0.9, 0.9), translate=(-0.45, 0.15, z), scale=(0.08, 0.12, 0.02))
+        
+        # Spots
+        segments = lod_segments(10, level)
+        spot = sphere_mesh(segments, segments)
+        model.add(spot, (0.1, 0.05, 0.05), translate=(-0.12, 0.08, 0.19), scale=0.09)
+        model.add(spot, (0.1, 0.05, 0.05), translate=(0.12, 0.02, 0.19), scale=0.10)
+        
+        # Tail (swings about its base)
+        model.add(cube, (0.95, 0.95, 0.95), translate=(0.35, -0.05, 0), scale=(0.03, 0.25, 0.03), swing=True)
+        return model.build()
+    
+    @staticmethod
+    def build_bubble(level=0):
+        # Exhaled CO2 in front of the head; baked at full size, growth shrinks it
+        segments = lod_segments(12, level)
+        model = ModelBuilder()
+        model.add(sphere_mesh(segments, segments), (0.35, 0.55, 0.95), translate=(-0.55, 0.18, 0), scale=0.22,
+                  grow=True)
+        return model.build(alpha=0.6)
+    
+    @classmethod
+    def draw_batch(cls, cows, time):
+        if not len(cows['pos']):
+            return
+        
+        # Gentle bobbing
+        offsets = np.array(cows['pos'], dtype=np.float32)
+        offsets[:, 1] += np.sin(time * 2.5 + cows['walk_offset']) * 0.04
+        lod.draw('cow', cls.models, offsets, cows['handle'], swing=20 + math.sin(time * 4) * 15)
+        
+        # CO2 bubble when breathing, smaller for the first 0.2 s of the breath
+        breathing = np.asarray(cows['breathing'], dtype=bool)
+        if breathing.any():
+            growth = np.where(cows['breath_timer'][breathing] < 2.7, np.float32(0.18 / 0.22), np.float32(1.0))
+            lod.draw('cow-breath', cls.bubble_models, offsets[breathing], cows['handle'][breathing], growth=growth)
+
+# Class untuk Car
+class Car:
+    COMPONENTS = (
+        ('pos', np.float64, (3,), 0.0),
+        ('exhaust_timer', np.float64, (), 0.0),
+        ('wheel_rotation', np.float64, (), 0.0),
+    )
+    EXHAUST_PERIOD = 0.25
+    
+    @staticmethod
+    def update(cars, dt):
+        cars['exhaust_timer'][:] += dt
+        cars['wheel_rotation'][:] += dt * 100
+    
+    @classmethod
+    def emit_exhaust(cls, cars, emitters):
+        timer = cars['exhaust_timer']
+        due = np.flatnonzero(timer > cls.EXHAUST_PERIOD)
+        if len(due):
+            rows, age = periodic_emissions(due, timer[due], cls.EXHAUST_PERIOD)
+            timer[due] = 0
+            emitters.emit(EmitterPool.EXHAUST, cars['pos'][rows] + (0.45, -0.12, 0.0), age)
+    
+    @staticmethod
+    def build_model(level=0):
+        model = ModelBuilder()
+        cube = cube_mesh()
+        
+        # Body
+        model.add(cube, (0.95, 0.75, 0.1), scale=(0.65, 0.23, 0.28))
+        
+        # Roof
+        model.add(cube, (0.95, 0.75, 0.1), translate=(0, 0.18, 0), scale=(0.38, 0.22, 0.26))
+        
+        if level == LOD_LEVELS - 1:
+            # Distant proxy: no windows, one dark slab in place of the four wheels
+            model.add(cube, (0.15, 0.15, 0.15), translate=(0, -0.17, 0), scale=(0.62, 0.18, 0.52))
+            return model.build()
+        
+        # Windows
+        for z in [0.14, -0.14]:
+            model.add(cube, (0.50, 0.75, 0.88), translate=(-0.05, 0.18, z), scale=(0.16, 0.16, 0.01))
+        
+        # Wheels (plain spheres, so wheel_rotation has no visible effect and is not baked in)
+        segments = lod_segments(12, level)
+        wheel = sphere_mesh(segments, segments)
+        for x in [-0.22, 0.22]:
+            for z in [-0.17, 0.17]:
+                model.add(wheel, (0.15, 0.15, 0.15), translate=(x, -0.17, z), scale=0.09)
+        return model.build()
+    
+    @classmethod
+    def draw_batch(cls, cars):
+        lod.draw('car', cls.models, cars['pos'], cars['handle'])
+    
+# Class untuk Soil/Ground dengan fosil
+class Soil:
+    COMPONENTS = (
+        ('pos', np.float64, (3,), 0.0),
+    )
+    
+    @staticmethod
+    def build_model(level=0):
+        model = ModelBuilder()
+        cube = cube_mesh()
+        
+        # Soil layer
+        model.add(cube, (0.45, 0.30, 0.20), scale=(0.9, 0.25, 0.6))
+        
+        # Fossils/bones
+        for i in range(3):
+            model.add(cube, (0.92, 0.90, 0.82), translate=(-0.3 + i * 0.3, 0, 0.1), rotate=45 + i * 30, scale=(0.18, 0.04, 0.04))
+        
+        if level == LOD_LEVELS - 1:
+            return model.build()
+        
+        # Small stones
+        segments = lod_segments(8, level)
+        stone = sphere_mesh(segments, segments)
+        for i in range(4):
+            model.add(stone, (0.45, 0.30, 0.20), translate=(-0.35 + i * 0.25, -0.05, -0.15), scale=0.04)
+        
+        # Roots coming down
+        for i in range(2):
+            model.add(cube, (0.45, 0.30, 0.15), translate=(-0.25 + i * 0.5, 0.18, 0), scale=(0.025, 0.18, 0.025))
+        return model.build()
+    
+    @classmethod
+    def draw_batch(cls, soils):
+        lod.draw('soil', cls.models, soils['pos'], soils['handle'])
+
+# Static part hierarchies, baked once at import for every LOD level
+for entity_class in (Tree, Factory, Cow, Car, Soil):
+    entity_class.models = [entity_class.build_model(level) for level in range(LOD_LEVELS)]
+Tree.glow_models = [Tree.build_glow(level) for level in range(LOD_LEVELS)]
+Cow.bubble_models = [Cow.build_bubble(level) for level in range(LOD_LEVELS)]
+
+# SimulationCore EntityTable attribute -> entity class
+ENTITY_TABLES = (('trees', Tree), ('factories', Factory), ('cows', Cow), ('cars', Car), ('soils', Soil))
+
+# Fungsi helper untuk matrix exponential (batch)
+def expm(matrices):
+    # exp of a stack of small matrices: scaling and squaring with a Taylor series
+    matrices = np.asarray(matrices, dtype=np.float64)
+    norm = np.abs(matrices).sum(axis=-2).max() if matrices.size else 0.0
+    squarings = max(0, int(math.ceil(math.log2(norm))) + 1) if norm > 0 else 0
+    scaled = matrices / 2.0 ** squarings
+    result = term = np.broadcast_to(np.eye(matrices.shape[-1]), matrices.shape).copy()
+    for k in range(1, 13):
+        term = term @ scaled / k
+        result = result + term
+    for _ in range(squarings):
+        result = result @ result
+    return result
+
+# Class untuk model karbon multi-reservoir (atmosfer, biosfer, tanah, fosil)
+class CarbonBudget:
+    # Linear model dX/dt = M X over RESERVOIRS, batched: one row per parameter set.
+    # The system is linear with constant coefficients between count changes, so a
+    # step of any length is exact: X(t + h) = expm(M h) X(t).
+    def __init__(self, trees, factories, cows, cars, soils=3, co2_level=100.0, decay=None):
+        values = np.broadcast_arrays(*(np.atleast_1d(np.asarray(v, dtype=np.float64))
+                                       for v in (trees, factories, cows, cars, soils, co2_level)))
+        atmosphere, soils = values[5], values[4]
+        
+        # Start from the balance of the natural cycle (no objects) at this CO2 level
+        biosphere = CARBON_RATES['uptake'] * atmosphere / (CARBON_RATES['respiration'] + CARBON_RATES['litter'])
+        soil = SOIL_CARBON * soils
+        if decay is None:
+            decay = np.divide(CARBON_RATES['litter'] * biosphere, soil, out=np.zeros_like(soil), where=soil > 0)
+        self.decay = np.broadcast_to(np.asarray(decay, dtype=np.float64), soil.shape).copy()
+        self.state = np.column_stack([atmosphere, biosphere, soil, np.full_like(atmosphere, FOSSIL_CARBON)])
+        self.counts = None
+        self.set_counts(*values[:4])
+    
+    def __len__(self):
+        return len(self.state)
+    
+    def set_counts(self, trees, factories, cows, cars):
+        counts = np.empty((len(self.state), 4))
+        counts[:] = np.column_stack(np.broadcast_arrays(*(np.atleast_1d(np.asarray(v, dtype=np.float64))
+                                                          for v in (trees, factories, cows, cars))))
+        if self.counts is not None and np.array_equal(counts, self.counts):
+            return
+        self.counts = counts
+        trees, factories, cows, cars = counts.T
+        uptake = CARBON_RATES['uptake'] + CARBON_RATES['tree'] * trees
+        respiration = CARBON_RATES['respiration'] + CARBON_RATES['grazing'] * cows
+        litter = CARBON_RATES['litter']
+        burn = CARBON_RATES['factory'] * factories + CARBON_RATES['car'] * cars
+        
+        # Column = donor reservoir, row = receiver; every column sums to zero (mass conserved)
+        m = np.zeros((len(self.state), 4, 4))
+        m[:, 0, 0], m[:, 1, 0] = -uptake, uptake
+        m[:, 0, 1], m[:, 1, 1], m[:, 2, 1] = respiration, -(respiration + litter), litter
+        m[:, 0, 2], m[:, 2, 2] = self.decay, -self.decay
+        m[:, 0, 3], m[:, 3, 3] = burn, -burn
+        self.matrix = m
+        self._propagators = {}
+    
+    def propagator(self, years):
+        years = float(years)
+        if years not in self._propagators:
+            if len(self._propagators) > 16:
+                self._propagators.clear()
+            self._propagators[years] = expm(self.matrix * years)
+        return self._propagators[years]
+    
+    def advance(self, years):
+        self.state = np.einsum('pij,pj->pi', self.propagator(years), self.state)
+        return self.state
+    
+    def project(self, years, samples=100):
+        # -> (times (samples + 1,), states (samples + 1, sets, reservoirs)); ends at t + years
+        step = self.propagator(years / samples)
+        states = np.empty((samples + 1,) + self.state.shape)
+        states[0] = self.state
+        for i in range(samples):
+            states[i + 1] = np.einsum('pij,pj->pi', step, states[i])
+        self.state = states[-1].copy()
+        return np.linspace(0, years, samples + 1), states
+
+# Simulation core (tanpa pygame/OpenGL)
+class SimulationCore:
+    def __init__(self, seed=None, counts=None, carbon_model='particles'):
+        # counts: optional {'tree': n, 'factory': n, 'cow': n, 'car': n} initial scene
+        self.seed = seed
+        self.counts = counts
+        self.carbon_model = carbon_model
+        self.reset()
+    
+    def reset(self):
+        # All randomness comes from this generator, so a seed replays exactly
+        self.rng = np.random.default_rng(self.seed)
+        self.time = 0
+        self.accumulator = 0
+        self.budget = None
+        self.reset_buffers()
+        
+        # Stats
+        self.co2_level = 100
+        self.photosynthesis_rate = 0
+        self.emission_rate = 0
+        
+        # Initialize scene
+        self.init_scene()
+    
+    def reset_buffers(self):
+        # Objects: one component table per entity type
+        for name, entity_class in ENTITY_TABLES:
+            setattr(self, name, EntityTable(entity_class.COMPONENTS))
+        self.co2_particles = ParticleBuffer()
+        self.emitters = EmitterPool()
+        self.absorb_grid = SpatialGrid(ABSORB_RADIUS)
+        
+    def init_scene(self):
+        if self.counts is not None:
+            for obj_type in OBJECT_TYPES:
+                self.place_objects(obj_type, self.counts.get(obj_type, 0))
+        else:
+            self.init_default_objects()
+        
+        # Add soil at bottom - fixed positions
+        soil_positions = [
+            (-3.5, -2.3, 0),
+            (-0.5, -2.3, 0),
+            (2.5, -2.3, 0)
+        ]
+        self.soils.add(len(soil_positions), pos=soil_positions)
+        
+        # Add some initial CO2 particles
+        if self.carbon_model == 'particles':
+            self.co2_particles.spawn(np.column_stack([
+                self.rng.uniform(-4, 4, 30),
+                self.rng.uniform(-1, 3, 30),
+                self.rng.uniform(-4, 4, 30)
+            ]), self.rng)
+    
+    def init_default_objects(self):
+        # Add initial objects in a circle
+        angles = np.linspace(0, 2 * np.pi, 12, endpoint=False)
+        radius = 4.5
+        
+        for i, angle in enumerate(angles):
+            x = radius * np.cos(angle)
+            z = radius * np.sin(angle)
+            
+            if i % 4 == 0:
+                self.trees.add(1, pos=(x, -1, z))
+            elif i % 4 == 1:
+                self.factories.add(1, pos=(x, -1, z))
+            elif i % 4 == 2:
+                self.cows.add(1, pos=(x, -1, z), walk_offset=self.rng.uniform(0, 2 * math.pi))
+            else:
+                self.cars.add(1, pos=(x, -1, z))
+    
+    def place_object(self, obj_type):
+        # Put one object at a random spot on the ring, without touching co2_level
+        angle = self.rng.uniform(0, 2 * np.pi)
+        radius = self.rng.uniform(3.5, 5.5)
+        x = radius * np.cos(angle)
+        z = radius * np.sin(angle)
+        
+        if obj_type == 'tree':
+            return self.trees.add(1, pos=(x, -1, z))[0]
+        elif obj_type == 'factory':
+            return self.factories.add(1, pos=(x, -1, z))[0]
+        elif obj_type == 'cow':
+            return self.cows.add(1, pos=(x, -1, z), walk_offset=self.rng.uniform(0, 2 * math.pi))[0]
+        elif obj_type == 'car':
+            return self.cars.add(1, pos=(x, -1, z))[0]
+    
+    def add_object(self, obj_type):
+        handle = self.place_object(obj_type)
+        self.co2_level += CO2_IMPACT[obj_type]
+        return handle
+    
+    def place_objects(self, obj_type, count, layout='ring', radius=BULK_RADIUS, min_distance=None):
+        # Bulk place_object: all spots in one vectorized layout, optionally kept clear
+        # of every existing tree/factory/cow/car. Returns how many were placed.
+        name, _ = ENTITY_TABLES[OBJECT_TYPES.index(obj_type)]
+        occupied = None
+        if min_distance is not None or layout == 'poisson':
+            occupied = np.concatenate([getattr(self, other)['pos'][:, [0, 2]]
+                                       for other, _ in ENTITY_TABLES[:len(OBJECT_TYPES)]])
+        spots = layout_positions(self.rng, count, layout, radius, min_distance, occupied)
+        pos = np.column_stack([spots[:, 0], np.full(len(spots), -1.0), spots[:, 1]])
+        if obj_type == 'cow':
+            self.cows.add(len(spots), pos=pos, walk_offset=self.rng.uniform(0, 2 * math.pi, len(spots)))
+        else:
+            getattr(self, name).add(len(spots), pos=pos)
+        return len(spots)
+    
+    def add_objects(self, obj_type, count, **layout):
+        # CO2 impact is applied once for the whole batch; a big tree batch stops at zero
+        placed = self.place_objects(obj_type, count, **layout)
+        self.co2_level = max(0.0, self.co2_level + CO2_IMPACT[obj_type] * placed)
+        return placed
+    
+    def set_carbon_model(self, model):
+        # 'reservoir' switches the particle sim off and lets CarbonBudget drive co2_level
+        self.carbon_model = model
+        self.budget = None  # rebuilt from the scene on the next reservoir step
+        if model == 'reservoir':
+            self.co2_particles.clear()
+    
+    def carbon_counts(self):
+        return len(self.trees), len(self.factories), len(self.cows), len(self.cars)
+    
+    def update_budget(self, dt):
+        if self.budget is None:
+            self.budget = CarbonBudget(*self.carbon_counts(), soils=len(self.soils), co2_level=self.co2_level)
+        else:
+            self.budget.set_counts(*self.carbon_counts())
+        # Objects added since the last step already moved co2_level (CO2_IMPACT);
+        # never hand the integrator a negative atmosphere
+        self.co2_level = max(0.0, self.co2_level)
+        self.budget.state[0, 0] = self.co2_level
+        self.budget.advance(dt * CARBON_YEARS_PER_SECOND)
+        self.co2_level = float(self.budget.state[0, 0])
+    
+    def step(self, dt=SIM_DT):
+        self.time += dt
+        self.update_entities(dt)
+        if self.carbon_model == 'reservoir':
+            self.emitters.update(dt, self.rng)
+            self.count_rates()
+            self.update_budget(dt)
+            return
+        self.update_particles(dt)
+        self.spawn_emissions(dt)
+        self.absorb_co2(max(1, round(dt / SIM_DT)))
+        self.update_rates(dt)
+    
+    def advance(self, elapsed, deadline=None):
+        # Fixed-timestep accumulator. elapsed=None runs as many steps as fit
+        # before the wall-clock deadline (unbounded fast-forward).
+        steps = 0
+        if elapsed is None:
+            while time.perf_counter() < deadline:
+                self.step(SIM_DT)
+                steps += 1
+            self.accumulator = 0
+            return steps
+        
+        self.accumulator += elapsed
+        while self.accumulator >= SIM_DT:
+            if deadline is not None and time.perf_counter() >= deadline:
+                # Falling behind: drop the backlog instead of spiralling
+                self.accumulator %= SIM_DT
+                break
+            self.step(SIM_DT)
+            self.accumulator -= SIM_DT
+            steps += 1
+        return steps
+    
+    @property
+    def alpha(self):
+        # How far between the previous and the current step the view should be
+        return min(self.accumulator / SIM_DT, 1.0)
+    
+    @property
+    def render_time(self):
+        return self.time - SIM_DT * (1.0 - self.alpha)
+    
+    def update_entities(self, dt):
+        # One vectorized system per entity type over its whole table
+        Tree.update(self.trees, dt, self.time)
+        
+        Factory.update(self.factories, dt)
+        Factory.emit_smoke(self.factories, self.emitters)
+        
+        Cow.update(self.cows, dt)
+        
+        Car.update(self.cars, dt)
+        Car.emit_exhaust(self.cars, self.emitters)
+    
+    def update_particles(self, dt):
+        self.co2_particles.update(dt, self.time)
+        self.emitters.update(dt, self.rng)
+    
+    def spawn_emissions(self, dt):
+        # Poisson spawn count for every source in one draw per type, so total emission
+        # scales with the number of sources; only emitting sources are touched after that
+        spawned = []
+        for obj_type, name in EMISSION_SOURCES:
+            sources = getattr(self, name)
+            if not sources:
+                continue
+            counts = self.rng.poisson(EMISSION_RATES[obj_type] * dt, len(sources))
+            emitting = np.flatnonzero(counts)
+            if not len(emitting):
+                continue
+            positions = np.repeat(sources['pos'][emitting], counts[emitting], axis=0) + EMISSION_OFFSETS[obj_type]
+            jitter = EMISSION_JITTER[obj_type]
+            if jitter:
+                positions[:, 0::2] += self.rng.uniform(-jitter, jitter, (len(positions), 2))
+            spawned.append(positions)
+        if spawned:
+            self.co2_particles.spawn(np.concatenate(spawned), self.rng)
+    
+    def absorb_co2(self, passes=1):
+        # Trees absorb CO2 - more dynamic (one particle per tree per step; a long
+        # step standing in for `passes` fixed steps runs one pass per fixed step)
+        particles = self.co2_particles
+        alive = np.ones(particles.count, dtype=bool)
+        if not len(self.trees) or not particles.count:
+            return
+        self.absorb_grid.build(particles.pos[:particles.count])
+        tree_idx, hits = self.absorb_grid.pairs(self.trees['pos'], ABSORB_RADIUS)
+        if not len(hits):
+            return
+        # Each tree takes its lowest-index live particle in range, trees in row order.
+        # Resolved in vectorized rounds: every open tree picks its first remaining
+        # candidate and keeps it unless a lower open tree still has that particle in
+        # range. The lowest open tree always wins, so each round makes progress.
+        pairs = np.sort(tree_idx * particles.count + hits)  # by tree, then particle
+        pair_trees, pair_hits = np.divmod(pairs, particles.count)
+        owner = np.full(particles.count, len(self.trees), dtype=np.int64)
+        absorbed = 0
+        for _ in range(passes):
+            live = alive[pair_hits]
+            tree_idx, hits = pair_trees[live], pair_hits[live]
+            resolved = np.zeros(len(self.trees), dtype=bool)
+            while len(hits):
+                first = np.flatnonzero(np.r_[True, tree_idx[1:] != tree_idx[:-1]])
+                trees, picks = tree_idx[first], hits[first]
+                owner[hits] = len(self.trees)
+                np.minimum.at(owner, hits, tree_idx)
+                won = owner[picks] == trees
+                alive[picks[won]] = False
+                resolved[trees[won]] = True
+                Tree.absorb_co2(self.trees, trees[won])
+                absorbed += int(np.count_nonzero(won))
+                remaining = ~resolved[tree_idx] & alive[hits]
+                tree_idx, hits = tree_idx[remaining], hits[remaining]
+        self.co2_level -= 0.5 * absorbed
+        particles.keep(alive)
+    
+    def count_rates(self):
+        self.photosynthesis_rate = len(self.trees) * 2
+        self.emission_rate = len(self.factories) * 5 + len(self.cars) * 3 + len(self.cows)
+    
+    def update_rates(self, dt):
+        self.count_rates()
+        
+        # Update CO2 level
+        self.co2_level += (self.emission_rate - self.photosynthesis_rate) * dt * 0.1
+        self.co2_level = max(0, min(500, self.co2_level))
+    
+    def snapshot(self):
+        # Whole state as flat arrays: scalars and the RNG state in one JSON string,
+        # entity fields as one column per field, particles as their live slices
+        meta = {
+            'version': SNAPSHOT_VERSION,
+            'seed': self.seed,
+            'counts': self.counts,
+            'time': float(self.time),
+            'accumulator': float(self.accumulator),
+            'co2_level': float(self.co2_level),
+            'photosynthesis_rate': self.photosynthesis_rate,
+            'emission_rate': self.emission_rate,
+            'rng': self.rng.bit_generator.state,
+            'carbon_model': self.carbon_model,
+        }
+        if self.budget is not None:
+            meta['budget'] = {'state': self.budget.state[0].tolist(), 'decay': float(self.budget.decay[0])}
+        arrays = {'meta': np.array(json.dumps(meta))}
+        for name, _ in ENTITY_TABLES:
+            for field, values in getattr(self, name).state().items():
+                arrays[f'{name}.{field}'] = values
+        for prefix, buffer in (('co2', self.co2_particles), ('emitters', self.emitters)):
+            for field, values in buffer.state().items():
+                arrays[f'{prefix}.{field}'] = values
+        return arrays
+    
+    def restore(self, arrays):
+        # In place: everything is replaced, so a running viewer can load into its core
+        meta = json.loads(str(arrays['meta']))
+        if meta['version'] != SNAPSHOT_VERSION:
+            raise ValueError(f"snapshot version {meta['version']}, expected {SNAPSHOT_VERSION}")
+        self.reset_buffers()
+        self.seed = meta['seed']
+        self.counts = meta['counts']
+        self.time = meta['time']
+        self.accumulator = meta['accumulator']
+        self.co2_level = meta['co2_level']
+        self.photosynthesis_rate = meta['photosynthesis_rate']
+        self.emission_rate = meta['emission_rate']
+        self.carbon_model = meta.get('carbon_model', 'particles')
+        self.budget = None
+        bit_generator = getattr(np.random, meta['rng']['bit_generator'])()
+        bit_generator.state = meta['rng']
+        self.rng = np.random.Generator(bit_generator)
+        
+        for name, _ in ENTITY_TABLES:
+            table = getattr(self, name)
+            table.restore({field: arrays[f'{name}.{field}'] for field in table.names + ('handle',)
+                           if f'{name}.{field}' in arrays})
+        for prefix, buffer in (('co2', self.co2_particles), ('emitters', self.emitters)):
+            buffer.restore({key[len(prefix) + 1:]: values for key, values in arrays.items()
+                            if key.startswith(prefix + '.')})
+        if 'budget' in meta:
+            self.budget = CarbonBudget(*self.carbon_counts(), soils=len(self.soils), decay=meta['budget']['decay'])
+            self.budget.state[0] = meta['budget']['state']
+        return meta
+    
+    def summary(self):
+        return {
+            'time': round(self.time, 3),
+            'co2_level': round(float(self.co2_level), 3),
+            'photosynthesis_rate': self.photosynthesis_rate,
+            'emission_rate': self.emission_rate,
+            'trees': len(self.trees),
+            'factories': len(self.factories),
+            'cows': len(self.cows),
+            'cars': len(self.cars),
+            'co2_particles': len(self.co2_particles),
+        }
+
+# Snapshot: seluruh state simulasi dalam satu file .npz (tanpa pickle)
+SNAPSHOT_VERSION = 1
+
+def save_snapshot(path, core, camera=None):
+    arrays = core.snapshot()
+    if camera is not None:
+        arrays['camera'] = np.array(json.dumps(camera))
+    # Uncompressed so loading is a straight read, even with 100k particles
+    if not path.endswith('.npz'):
+        path += '.npz'
+    np.savez(path, **arrays)
+    return path
+
+def read_snapshot(path):
+    # -> (arrays for SimulationCore.restore, camera dict or None)
+    with np.load(path, allow_pickle=False) as data:
+        arrays = {name: data[name] for name in data.files}
+    camera = json.loads(str(arrays['camera'])) if 'camera' in arrays else None
+    return arrays, camera
+
+def load_snapshot(path):
+    # -> (SimulationCore, camera dict or None)
+    arrays, camera = read_snapshot(path)
+    core = SimulationCore.__new__(SimulationCore)
+    core.restore(arrays)
+    return core, camera
+
+# Class untuk state yang dibaca renderer (salinan per tick simulasi)
+class RenderFrame:
+    # Everything render_frame reads, copied out of a SimulationCore. Arrays are
+    # read-only: a published frame never changes, the next tick publishes a new one.
+    def __init__(self, core, rate=0.0):
+        # rate: simulated seconds per wall second while this frame is the latest
+        self.time = core.time
+        self.accumulator = core.accumulator
+        self.co2_level = float(core.co2_level)
+        self.photosynthesis_rate = core.photosynthesis_rate
+        self.emission_rate = core.emission_rate
+        self.carbon_model = core.carbon_model
+        self.entities = {name: getattr(core, name).state() for name, _ in ENTITY_TABLES}
+        
+        particles = core.co2_particles
+        n = particles.count
+        self.co2_prev_pos = particles.prev_pos[:n].copy()
+        self.co2_pos = particles.pos[:n].copy()
+        self.co2_size = particles.size[:n].copy()
+        self.co2_float_offset = particles.float_offset[:n].copy()
+        self.emitter_sprites = tuple(np.array(values) for values in core.emitters.sprites())
+        self.smoke = core.emitters.count_kind(EmitterPool.SMOKE)
+        self.exhaust = core.emitters.count_kind(EmitterPool.EXHAUST)
+        
+        for array in (self.co2_prev_pos, self.co2_pos, self.co2_size, self.co2_float_offset, *self.emitter_sprites,
+                      *(values for columns in self.entities.values() for values in columns.values())):
+            array.setflags(write=False)
+        self.rate = rate
+        self.published = time.perf_counter()
+    
+    def count(self, name):
+        return len(self.entities[name]['pos'])
+    
+    def alpha(self, now=None):
+        # Step fraction to draw: the leftover accumulator plus the sim time that has
+        # passed since publishing, clamped so a late simulation holds its last step
+        if now is None:
+            now = time.perf_counter()
+        return min((self.accumulator + (now - self.published) * self.rate) / SIM_DT, 1.0)
+    
+    def render_time(self, alpha):
+        return self.time - SIM_DT * (1.0 - alpha)
+    
+    def co2_sprites(self, alpha):
+        return co2_sprites(self.co2_prev_pos, self.co2_pos, self.co2_size, self.co2_float_offset, alpha)
+
+# Class untuk thread simulasi (fixed rate, terpisah dari render loop)
+class SimulationThread:
+    # Steps the core at a fixed tick rate and publishes a RenderFrame after every
+    # tick. The render loop reads `latest` (a single reference swap, so it always
+    # sees a whole frame) and changes the core only through call().
+    def __init__(self, core, rate=FPS):
+        self.core = core
+        self.tick = 1.0 / rate
+        self.paused = False
+        self.time_scale = TIME_SCALES[0]
+        self.tick_ms = 0.0
+        self.late_ticks = 0
+        self.commands = queue.Queue()
+        self.latest = RenderFrame(core)
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self._run, name='simulation', daemon=True)
+    
+    def start(self):
+        self.thread.start()
+    
+    def stop(self):
+        self.stopping.set()
+        self.thread.join()
+    
+    def call(self, command):
+        # command(core) runs on the simulation thread, between steps
+        self.commands.put(command)
+    
+    def _run(self):
+        next_tick = last = time.perf_counter()
+        while not self.stopping.is_set():
+            start = time.perf_counter()
+            elapsed, last = min(start - last, 0.25), start
+            while True:
+                try:
+                    command = self.commands.get_nowait()
+                except queue.Empty:
+                    break
+                command(self.core)
+            
+            rate = 0.0
+            if not self.paused:
+                # Leave part of every tick free: stepping holds the GIL, and the
+                # render thread needs it to build and draw frames
+                deadline = start + self.tick * SIM_SHARE
+                if self.time_scale is None:
+                    steps = self.core.advance(None, deadline)
+                    rate = steps * SIM_DT / self.tick
+                else:
+                    self.core.advance(elapsed * self.time_scale, deadline)
+                    rate = self.time_scale
+            self.latest = RenderFrame(self.core, rate)
+            self.tick_ms = (time.perf_counter() - start) * 1000
+            
+            next_tick += self.tick
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                self.stopping.wait(delay)
+            else:
+                # Behind: rest for the headroom share (releasing the GIL) and start
+                # the next tick after that instead of trying to catch up
+                self.late_ticks += 1
+                self.stopping.wait(self.tick * (1 - SIM_SHARE))
+                next_tick = time.perf_counter()
+
+def run_headless(steps, dt=SIM_DT, seed=None, snapshot=None, spawn=None, layout=None, carbon_model=None):
+    if snapshot:
+        core, _ = load_snapshot(snapshot)
+        if seed is not None:
+            core.rng = np.random.default_rng(seed)
+    else:
+        core = SimulationCore(seed)
+    if carbon_model and carbon_model != core.carbon_model:
+        core.set_carbon_model(carbon_model)
+    if spawn:
+        spawn_objects(core, spawn, **(layout or {}))
+    start, start_time = time.perf_counter(), core.time
+    for _ in range(steps):
+        core.step(dt)
+    elapsed = time.perf_counter() - start
+    simulated = core.time - start_time
+    
+    stats = core.summary()
+    print(f"{steps} steps, {simulated:.1f} s simulated in {elapsed:.3f} s wall "
+          f"({simulated / max(elapsed, 1e-9):.0f}x real time)")
+    for name, value in stats.items():
+        print(f"  {name}: {value}")
+    return core
+
+# Scenario sweep: banyak run headless paralel, hasil disimpan per kolom
+SWEEP_COLUMNS = ('co2_level', 'photosynthesis_rate', 'emission_rate')
+
+def scenario_grid(trees=(3,), factories=(3,), cows=(3,), cars=(3,), seeds=(0,), duration=60.0):
+    return [
+        {'tree': t, 'factory': f, 'cow': c, 'car': v, 'seed': s, 'duration': duration}
+        for t, f, c, v, s in itertools.product(trees, factories, cows, cars, seeds)
+    ]
+
+def run_scenario(index, scenario, sample_interval=1.0, snapshot=None):
+    counts = {obj_type: scenario[obj_type] for obj_type in OBJECT_TYPES}
+    if snapshot:
+        # Start from the saved scene: the seed reseeds it, counts are objects added on top
+        core, _ = load_snapshot(snapshot)
+        core.rng = np.random.default_rng(scenario['seed'])
+        for obj_type in OBJECT_TYPES:
+            core.add_objects(obj_type, counts[obj_type])
+    else:
+        core = SimulationCore(scenario['seed'], counts)
+    steps_per_sample = max(1, int(round(sample_interval / SIM_DT)))
+    samples = int(scenario['duration'] / (steps_per_sample * SIM_DT)) + 1
+    
+    trajectory = {name: np.empty(samples, dtype=np.float32) for name in SWEEP_COLUMNS}
+    for i in range(samples):
+        if i:
+            for _ in range(steps_per_sample):
+                core.step(SIM_DT)
+        for name in SWEEP_COLUMNS:
+            trajectory[name][i] = getattr(core, name)
+    return index, trajectory
+
+def write_scenarios(out_dir, scenarios):
+    with open(os.path.join(out_dir, 'scenarios.csv'), 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=['index', *OBJECT_TYPES, 'seed', 'duration'])
+        writer.writeheader()
+        for index, scenario in enumerate(scenarios):
+            writer.writerow({'index': index, **scenario})
+
+def run_sweep(scenarios, out_dir, workers=None, sample_interval=1.0, snapshot=None):
+    # Results go to out_dir as one memory-mappable .npy file per column,
+    # shape (scenarios, samples), filled in as runs finish
+    os.makedirs(out_dir, exist_ok=True)
+    max_duration = max(scenario['duration'] for scenario in scenarios)
+    steps_per_sample = max(1, int(round(sample_interval / SIM_DT)))
+    samples = int(max_duration / (steps_per_sample * SIM_DT)) + 1
+    
+    write_scenarios(out_dir, scenarios)
+    np.save(os.path.join(out_dir, 't.npy'), np.arange(samples) * steps_per_sample * SIM_DT)
+    columns = {
+        name: np.lib.format.open_memmap(os.path.join(out_dir, f'{name}.npy'), mode='w+',
+                                        dtype=np.float32, shape=(len(scenarios), samples))
+        for name in SWEEP_COLUMNS
+    }
+    for column in columns.values():
+        column[:] = np.nan
+    done = np.lib.format.open_memmap(os.path.join(out_dir, 'done.npy'), mode='w+',
+                                     dtype=bool, shape=(len(scenarios),))
+    
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_scenario, index, scenario, sample_interval, snapshot)
+                   for index, scenario in enumerate(scenarios)]
+        for finished, future in enumerate(as_completed(futures), 1):
+            index, trajectory = future.result()
+            for name in SWEEP_COLUMNS:
+                values = trajectory[name]
+                columns[name][index, :len(values)] = values
+                columns[name].flush()
+            done[index] = True
+            done.flush()
+            print(f"[{finished}/{len(scenarios)}] scenario {index} done "
+                  f"({time.perf_counter() - start:.1f} s)")
+    return out_dir
+
+def run_projection(scenarios, years, out_dir, samples=100, co2_level=100.0):
+    # Every scenario in one CarbonBudget batch. Same layout as run_sweep: scenarios.csv,
+    # t.npy (years) and one (scenarios, samples) .npy per reservoir
+    os.makedirs(out_dir, exist_ok=True)
+    write_scenarios(out_dir, scenarios)
+    counts = [[scenario[obj_type] for scenario in scenarios] for obj_type in OBJECT_TYPES]
+    start = time.perf_counter()
+    budget = CarbonBudget(*counts, co2_level=co2_level)
+    times, states = budget.project(years, samples)
+    elapsed = time.perf_counter() - start
+    
+    np.save(os.path.join(out_dir, 't.npy'), times)
+    for i, name in enumerate(RESERVOIRS):
+        np.save(os.path.join(out_dir, f'{name}.npy'), states[:, :, i].T.astype(np.float32))
+    print(f"{len(scenarios)} skenario x {years:g} tahun dalam {elapsed * 1000:.1f} ms -> {out_dir}")
+    final = states[-1, :, 0]
+    print(f"  atmosfer akhir: min {final.min():.1f} | rata-rata {final.mean():.1f} | maks {final.max():.1f} ppm")
+    return times, states
+
+def parse_values(text):
+    # "0,10,50" or "0-9" -> list of ints
+    values = []
+    for part in text.split(','):
+        if '-' in part[1:]:
+            lo, hi = part.split('-', 1)
+            values.extend(range(int(lo), int(hi) + 1))
+        else:
+            values.append(int(part))
+    return values
+
+def parse_spawn(text):
+    # "tree=5000,factory=500" -> {'tree': 5000, 'factory': 500}
+    spawn = {}
+    for part in text.split(','):
+        obj_type, count = part.split('=')
+        if obj_type not in OBJECT_TYPES:
+            raise ValueError(f"unknown object type {obj_type!r}")
+        spawn[obj_type] = int(count)
+    return spawn
+
+def spawn_objects(core, spawn, **layout):
+    start = time.perf_counter()
+    placed = {obj_type: core.add_objects(obj_type, count, **layout) for obj_type, count in spawn.items()}
+    elapsed = time.perf_counter() - start
+    # stderr, so a raw recording on stdout stays clean
+    print(f"{sum(placed.values())} objek ditambahkan dalam {elapsed * 1000:.0f} ms ("
+          + ", ".join(f"{obj_type} {placed[obj_type]}/{count}" for obj_type, count in spawn.items()) + ")",
+          file=sys.stderr)
+    return placed
+
+# Class untuk merekam frame offscreen (FBO + PBO readback asinkron)
+class FrameRecorder:
+    def __init__(self, width, height, out, pbo_count=3):
+        # out: directory for a PNG sequence, or '-' / a *.raw path for raw RGB24 frames
+        self.width = width
+        self.height = height
+        self.out = out
+        self.pbo_count = pbo_count
+        self.frame_bytes = width * height * 4
+        self.fbo = None
+        self.pbos = []
+        self.pending = []  # PBO indices with a readback in flight, oldest first
+        self.frames = 0
+        self.queue = None
+        self.writer = None
+
+    def setup(self):
+        self.fbo = glGenFramebuffers(1)
+        color, depth = glGenRenderbuffers(2)
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+        glBindRenderbuffer(GL_RENDERBUFFER, color)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_RGBA8, self.width, self.height)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_RENDERBUFFER, color)
+        glBindRenderbuffer(GL_RENDERBUFFER, depth)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_DEPTH_COMPONENT24, self.width, self.height)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_DEPTH_ATTACHMENT, GL_RENDERBUFFER, depth)
+        glBindRenderbuffer(GL_RENDERBUFFER, 0)
+        status = glCheckFramebufferStatus(GL_FRAMEBUFFER)
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        if status != GL_FRAMEBUFFER_COMPLETE:
+            raise RuntimeError(f"framebuffer incomplete (0x{status:x})")
+        
+        # A ring of pack buffers: frame N is read into one while frame N - (count - 1) is mapped
+        self.pbos = list(np.atleast_1d(glGenBuffers(self.pbo_count)))
+        for pbo in self.pbos:
+            glBindBuffer(GL_PIXEL_PACK_BUFFER, pbo)
+            glBufferData(GL_PIXEL_PACK_BUFFER, self.frame_bytes, None, GL_STREAM_READ)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        
+        # Encoding and disk/pipe writes happen on a worker thread
+        if self.out == '-':
+            self.stream = sys.stdout.buffer
+        elif self.out.endswith('.raw'):
+            self.stream = open(self.out, 'wb')
+        else:
+            self.stream = None
+            os.makedirs(self.out, exist_ok=True)
+        self.queue = queue.Queue(maxsize=2 * self.pbo_count)
+        self.writer = threading.Thread(target=self._write_frames, daemon=True)
+        self.writer.start()
+
+    def begin(self):
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+        glViewport(0, 0, self.width, self.height)
+
+    def end(self):
+        # Queue this frame's readback; collect the oldest one once the ring is full
+        slot = self.frames % self.pbo_count
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, self.pbos[slot])
+        glReadPixels(0, 0, self.width, self.height, GL_RGBA, GL_UNSIGNED_BYTE, ctypes.c_void_p(0))
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        self.pending.append(slot)
+        self.frames += 1
+        if len(self.pending) == self.pbo_count:
+            self._collect(self.pending.pop(0))
+
+    def _collect(self, slot):
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, self.pbos[slot])
+        address = glMapBuffer(GL_PIXEL_PACK_BUFFER, GL_READ_ONLY)
+        pixels = np.frombuffer((ctypes.c_ubyte * self.frame_bytes).from_address(address), dtype=np.uint8).copy()
+        glUnmapBuffer(GL_PIXEL_PACK_BUFFER)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        self.queue.put(pixels)
+
+    def _write_frames(self):
+        index = 0
+        while True:
+            pixels = self.queue.get()
+            if pixels is None:
+                break
+            # GL rows start at the bottom; drop alpha on the way out
+            rgb = np.ascontiguousarray(pixels.reshape(self.height, self.width, 4)[::-1, :, :3])
+            if self.stream is not None:
+                self.stream.write(rgb.tobytes())
+            else:
+                surface = pygame.image.frombuffer(rgb.tobytes(), (self.width, self.height), 'RGB')
+                pygame.image.save(surface, os.path.join(self.out, f"frame_{index:05d}.png"))
+            index += 1
+
+    def finish(self):
+        # Drain readbacks still in flight, then wait for the writer
+        while self.pending:
+            self._collect(self.pending.pop(0))
+        self.queue.put(None)
+        self.writer.join()
+        if self.stream is not None:
+            self.stream.flush()
+            if self.stream is not sys.stdout.buffer:
+                self.stream.close()
+        glDeleteBuffers(len(self.pbos), self.pbos)
+        glDeleteFramebuffers(1, [self.fbo])
+        self.pbos = []
+        self.fbo = None
+
+# Event yang dipakai handle_event, yang lain tidak perlu direkam
+RECORDED_EVENTS = ('QUIT', 'VIDEORESIZE', 'KEYDOWN', 'MOUSEBUTTONDOWN', 'MOUSEBUTTONUP', 'MOUSEMOTION')
+# Keys that save/load snapshots or profiles: a replay skips them, so it neither
+# writes files nor depends on ones that may be gone
+REPLAY_SKIPPED_KEYS = ('K_s', 'K_l', 'K_o')
+if pygame is not None:
+    RECORDED_EVENTS = tuple(getattr(pygame, name) for name in RECORDED_EVENTS)
+    REPLAY_SKIPPED_KEYS = tuple(getattr(pygame, name) for name in REPLAY_SKIPPED_KEYS)
+
+def apply_run_options(core, carbon_model=None, spawn=None, layout=None):
+    # --carbon-model and --spawn on top of a fresh (or loaded) core; the same for a
+    # session and for its replay, which gets them from the input log
+    if carbon_model:
+        core.set_carbon_model(carbon_model)
+    if spawn:
+        spawn_objects(core, spawn, **(layout or {}))
+
+# Class untuk merekam input per frame (event + langkah simulasi) untuk replay
+class InputLog:
+    VERSION = 1
+    FRAME_COLUMNS = ('dt', 'steps', 'accumulator', 'time', 'co2_level')
+    EVENT_COLUMNS = ('frame', 'type', 'key', 'x', 'y')
+
+    def __init__(self, path, seed, snapshot=None, options=None):
+        self.path = path
+        self.seed = seed
+        self.snapshot = snapshot
+        self.options = options  # apply_run_options arguments of the session
+        self.frames = []       # one row of FRAME_COLUMNS per rendered frame
+        self.events = []       # one row of EVENT_COLUMNS per handled event
+        self.event_times = []  # simulation time each event was handled at
+
+    def add_event(self, event, sim_time):
+        if event.type == pygame.VIDEORESIZE:
+            x, y = event.w, event.h
+        else:
+            x, y = getattr(event, 'pos', (0, 0))
+        self.events.append((len(self.frames), event.type, getattr(event, 'key', 0), x, y))
+        self.event_times.append(sim_time)
+
+    def add_frame(self, dt, steps, core):
+        self.frames.append((dt, steps, core.accumulator, core.time, core.co2_level))
+
+    def save(self):
+        meta = {'version': self.VERSION, 'seed': self.seed, 'snapshot': self.snapshot, 'options': self.options or {}}
+        frames = np.array(self.frames, dtype=np.float64).reshape(-1, len(self.FRAME_COLUMNS))
+        events = np.array(self.events, dtype=np.int32).reshape(-1, len(self.EVENT_COLUMNS))
+        np.savez_compressed(self.path, meta=np.array(json.dumps(meta)),
+                            frames=frames, events=events,
+                            event_times=np.array(self.event_times, dtype=np.float64))
+        return self.path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            if meta['version'] != cls.VERSION:
+                raise ValueError(f"input log version {meta['version']}, expected {cls.VERSION}")
+            log = cls(path, meta['seed'], meta['snapshot'], meta.get('options'))
+            log.frames = data['frames']
+            log.events = data['events']
+            log.event_times = data['event_times']
+        return log
+
+    def frame_events(self, frame):
+        # Events handled at the start of `frame`, rebuilt as pygame events
+        frames = self.events[:, 0]
+        start, stop = np.searchsorted(frames, frame), np.searchsorted(frames, frame, side='right')
+        return [pygame.event.Event(int(kind), key=int(key), pos=(int(x), int(y)), w=int(x), h=int(y))
+                for _, kind, key, x, y in self.events[start:stop]]
+
+# Main simulation class (pygame/OpenGL viewer on top of SimulationCore)
+class CarbonCycleSimulation:
+    def __init__(self, seed=None, renderer='legacy', offscreen_size=None, headless=False, threaded=False,
+                 quality='auto', frame_budget=FRAME_BUDGET_MS):
+        # headless: no window or GL at all, only events and simulation (input replay)
+        # threaded: run() steps the simulation on a SimulationThread (not while recording input)
+        self.renderer = renderer
+        self.headless = headless
+        self.threaded = threaded
+        self.sim_thread = None
+        self.input_log = None
+        self.core = SimulationCore(seed)
+        # quality: 'auto' adapts to frame_budget (ms) in run(), a tier name fixes it
+        self.governor = QualityGovernor(frame_budget, 0 if quality == 'auto' else QUALITY_MODES.index(quality) - 1,
+                                        adaptive=quality == 'auto')
+        self.grass = GrassField(self.governor.settings['grass'])
+        self.last_snapshot = None
+        self.spawn_keys = {pygame.K_t: 'tree', pygame.K_f: 'factory', pygame.K_c: 'cow', pygame.K_v: 'car'}
+        if headless:
+            self.screen_width, self.screen_height = WIDTH, HEIGHT
+            self.reset_scene()
+            return
+        
+        pygame.init()
+        if offscreen_size:
+            # Render target is an FBO of this size; the window only carries the GL context
+            self.screen_width, self.screen_height = offscreen_size
+            self.display = pygame.display.set_mode((64, 64), OPENGL | getattr(pygame, 'HIDDEN', 0))
+        else:
+            # Get display info for better window handling
+            display_info = pygame.display.Info()
+            self.screen_width = min(WIDTH, display_info.current_w - 100)
+            self.screen_height = min(HEIGHT, display_info.current_h - 100)
+            
+            self.display = pygame.display.set_mode((self.screen_width, self.screen_height), DOUBLEBUF | OPENGL | RESIZABLE)
+        pygame.display.set_caption("Simulasi 3D Siklus Karbon - Interaktif")
+        
+        self.setup_opengl()
+        self.reset_scene()
+        self.apply_quality()
+        
+        # Font for UI
+        self.font = pygame.font.Font(None, 40)
+        self.small_font = pygame.font.Font(None, 26)
+        
+    def setup_opengl(self):
+        # Setup OpenGL (fresh context: cached meshes must be rebuilt)
+        mesh_cache.invalidate()
+        particle_renderer.invalidate()
+        text_cache.invalidate()
+        self.grass.invalidate()
+        self.hud_list = None
+        self.hud_key = None
+        self.profiler_labels = []
+        glEnable(GL_DEPTH_TEST)
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        glEnable(GL_LIGHTING)
+        glEnable(GL_LIGHT0)
+        glEnable(GL_LIGHT1)
+        glEnable(GL_COLOR_MATERIAL)
+        glColorMaterial(GL_FRONT_AND_BACK, GL_AMBIENT_AND_DIFFUSE)
+        # Cached meshes are unit-sized and scaled, keep their normals unit length
+        glEnable(GL_NORMALIZE)
+        
+        # Sky blue background
+        glClearColor(0.53, 0.81, 0.92, 1.0)
+        
+        # Main light (sun) and fill light, shared with the shader renderer
+        for light, (position, ambient, diffuse) in zip((GL_LIGHT0, GL_LIGHT1), LIGHTS):
+            glLight(light, GL_POSITION, (*position, 1))
+            glLight(light, GL_AMBIENT, (*ambient, 1))
+            glLight(light, GL_DIFFUSE, (*diffuse, 1))
+        glLight(GL_LIGHT0, GL_SPECULAR, (1.0, 1.0, 0.9, 1))
+        
+        # Optional programmable pipeline, legacy fixed-function stays the fallback
+        shader_renderer.invalidate()
+        if self.renderer == 'shader' and not shader_renderer.setup():
+            print(f"Renderer shader tidak tersedia ({shader_renderer.error}), memakai legacy")
+        
+        # Perspective
+        glMatrixMode(GL_PROJECTION)
+        glLoadIdentity()
+        gluPerspective(FOV_Y, self.screen_width / self.screen_height, 0.1, 50.0)
+        glMatrixMode(GL_MODELVIEW)
+        glLoadIdentity()
+        glTranslatef(0, -1, -16)
+        
+    def reset_scene(self):
+        # Game state
+        self.clock = pygame.time.Clock()
+        self.running = True
+        self.paused = False
+        self.time_scale = TIME_SCALES[0]
+        self.spawn_batch = SPAWN_BATCHES[0]
+        self.last_spawn = None  # (placed, requested) of the last batch keypress
+        
+        # Camera rotation
+        self.rotation_x = 25
+        self.rotation_y = 0
+        self.auto_rotate = True
+        self.mouse_down = False
+        self.last_mouse_pos = None
+        
+        # Simulation state
+        self.apply(lambda core: core.reset())
+        if not self.headless:
+            self.grass.build()
+        
+    def camera_state(self):
+        return {'rotation_x': self.rotation_x, 'rotation_y': self.rotation_y, 'auto_rotate': self.auto_rotate}
+    
+    def apply(self, command):
+        # Every change to the core goes through here: command(core) runs right away,
+        # or between steps on the simulation thread when there is one
+        if self.sim_thread is not None:
+            self.sim_thread.call(command)
+        else:
+            command(self.core)
+    
+    def spawn_batch_objects(self, core, obj_type, batch):
+        # A full area takes fewer than asked; say so instead of failing silently
+        spacing = fill_spacing(batch, sum(core.carbon_counts()))
+        placed = core.add_objects(obj_type, batch, layout='poisson', min_distance=spacing)
+        self.last_spawn = (placed, batch)
+        if placed < batch:
+            print(f"{obj_type}: {placed}/{batch} ditempatkan, area sudah penuh")
+    
+    def apply_quality(self):
+        settings = self.governor.settings
+        lod.detail = settings['detail']
+        particle_renderer.limit = settings['sprites']
+        if self.grass.blades != settings['grass']:
+            self.grass.blades = settings['grass']
+            self.grass.build()
+    
+    def current_frame(self):
+        if self.sim_thread is not None:
+            return self.sim_thread.latest
+        return RenderFrame(self.core)
+    
+    def save_snapshot(self, path):
+        camera = self.camera_state()
+        
+        def save(core):
+            self.last_snapshot = save_snapshot(path, core, camera)
+            print(f"Snapshot disimpan ke {self.last_snapshot}")
+        self.apply(save)
+    
+    def load_snapshot(self, path):
+        arrays, camera = read_snapshot(path)
+        self.apply(lambda core: core.restore(arrays))
+        for name, value in (camera or {}).items():
+            setattr(self, name, value)
+        self.last_snapshot = path
+    
+    def draw_clouds(self, render_time):
+        glDisable(GL_LIGHTING)
+        
+        # Multiple cloud layers
+        cloud_positions = [
+            (-8, 6, -10), (5, 7, -12), (-3, 8, -15),
+            (10, 6.5, -8), (-6, 7.5, -11), (3, 8.5, -14),
+            (8, 6, -13), (-10, 7, -9)
+        ]
+        
+        for i, (x, y, z) in enumerate(cloud_positions[:self.governor.settings['clouds']]):
+            offset_x = math.sin(render_time * 0.3 + i) * 2
+            offset_y = math.sin(render_time * 0.5 + i * 0.7) * 0.3
+            if not frustum.visible((x + offset_x + 0.2, y + offset_y, z), 1.7):
+                continue
+            
+            glColor4f(1.0, 1.0, 1.0, 0.85)
+            glPushMatrix()
+            glTranslatef(x + offset_x, y + offset_y, z)
+            
+            # Multi-sphere cloud
+            draw_sphere(1.2, 12, 12, lod_key=('cloud', i, 0))
+            glTranslatef(0.8, 0, 0)
+            draw_sphere(1.0, 12, 12, lod_key=('cloud', i, 1))
+            glTranslatef(-0.4, 0.3, 0)
+            draw_sphere(0.9, 12, 12, lod_key=('cloud', i, 2))
+            glTranslatef(-0.8, 0, 0)
+            draw_sphere(0.85, 12, 12, lod_key=('cloud', i, 3))
+            
+            glPopMatrix()
+        
+        glEnable(GL_LIGHTING)
+    
+    def draw_co2_center(self, render_time):
+        # Central CO2 visualization
+        pulse = 1.0 + 0.15 * math.sin(render_time * 3)
+        if not frustum.visible((0, 1.5, 0), 0.9 * pulse):
+            return
+        
+        glPushMatrix()
+        glTranslatef(0, 1.5, 0)
+        
+        # Outer glow
+        glColor4f(0.35, 0.55, 0.95, 0.25)
+        draw_sphere(0.9 * pulse, 20, 20, lod_key=('co2', 0))
+        
+        # Main sphere
+        glColor4f(0.45, 0.70, 1.0, 0.7)
+        draw_sphere(0.65 * pulse, 20, 20, lod_key=('co2', 1))
+        
+        # Inner core
+        glColor4f(0.6, 0.8, 1.0, 0.9)
+        draw_sphere(0.4 * pulse, 20, 20, lod_key=('co2', 2))
+        
+        glPopMatrix()
+    
+    def update(self, dt, steps=None):
+        # Returns the number of simulation steps taken; a replay passes the recorded count
+        if self.sim_thread is not None:
+            # The thread steps on its own clock; only hand over the controls
+            self.sim_thread.paused = self.paused
+            self.sim_thread.time_scale = self.time_scale
+            steps = 0
+        if self.paused:
+            return 0
+        
+        if steps is not None:
+            for _ in range(steps):
+                self.core.step(SIM_DT)
+        else:
+            # Fixed-step simulation, time_scale steps of sim time per second of wall time
+            deadline = time.perf_counter() + SIM_FRAME_BUDGET
+            if self.time_scale is None:
+                steps = self.core.advance(None, deadline)
+            else:
+                steps = self.core.advance(dt * self.time_scale, deadline)
+        
+        # Auto rotation
+        if self.auto_rotate and not self.mouse_down:
+            self.rotation_y += 12 * dt
+        return steps
+    
+    def render_frame(self):
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        
+        glPushMatrix()
+        
+        # Apply rotation
+        glRotatef(self.rotation_x, 1, 0, 0)
+        glRotatef(self.rotation_y, 0, 1, 0)
+        lod.begin_frame(self.screen_height)
+        frustum.update()
+        
+        # Latest published state, drawn alpha of the way into the step it is heading for
+        frame = self.frame = self.current_frame()
+        alpha = frame.alpha()
+        render_time = frame.render_time(alpha)
+        
+        # Draw clouds in background
+        self.draw_clouds(render_time)
+        profiler.lap('clouds')
+        
+        # Draw ground plane and grass (baked, one draw call)
+        glDisable(GL_LIGHTING)
+        self.grass.draw()
+        glEnable(GL_LIGHTING)
+        profiler.lap('grass')
+        
+        # Draw central CO2
+        self.draw_co2_center(render_time)
+        
+        # Draw all objects, one batched draw per entity type
+        Tree.draw_batch(frame.entities['trees'])
+        Factory.draw_batch(frame.entities['factories'])
+        Cow.draw_batch(frame.entities['cows'], render_time)
+        Car.draw_batch(frame.entities['cars'])
+        Soil.draw_batch(frame.entities['soils'])
+        profiler.lap('entities')
+        
+        # Smoke, exhaust and CO2 particles in a single sprite batch
+        particle_renderer.add(*frame.emitter_sprites)
+        particle_renderer.add(*frame.co2_sprites(alpha))
+        particle_renderer.flush()
+        profiler.lap('particles')
+        
+        # Draw sun
+        if frustum.visible((8, 10, -12), 1.5):
+            glDisable(GL_LIGHTING)
+            glColor3f(1.0, 0.95, 0.7)
+            glPushMatrix()
+            glTranslatef(8, 10, -12)
+            draw_sphere(1.5, 20, 20, lod_key='sun')
+            glPopMatrix()
+            glEnable(GL_LIGHTING)
+        
+        glPopMatrix()
+        
+        # Draw UI
+        self.draw_ui()
+        if profiler.enabled:
+            self.draw_profiler()
+        profiler.lap('ui')
+    
+    def hud_labels(self):
+        # Everything the HUD shows, as (text, x, y, font, color) tuples
+        labels = [("SIMULASI 3D SIKLUS KARBON", 25, 35, self.font, (255, 255, 150))]
+        
+        # Stats
+        y = 105
+        frame = self.frame
+        co2_color = (100, 255, 150) if frame.co2_level < 150 else (255, 200, 100) if frame.co2_level < 300 else (255, 100, 100)
+        labels += [
+            (f"CO2 Level: {int(frame.co2_level)} ppm", 25, y, self.small_font, co2_color),
+            (f"Model: {'Reservoir' if frame.carbon_model == 'reservoir' else 'Partikel'}", 200, y, self.small_font, (200, 220, 255)),
+            (f"Fotosintesis: -{frame.photosynthesis_rate}", 25, y + 35, self.small_font, (100, 255, 150)),
+            (f"Emisi: +{frame.emission_rate}", 25, y + 70, self.small_font, (255, 150, 150)),
+            (f"Tambah: x{self.spawn_batch}", 200, y + 35, self.small_font, (200, 220, 255)),
+            (f"Kecepatan: {'Maks' if self.time_scale is None else f'{self.time_scale}x'}", 200, y + 70, self.small_font, (200, 220, 255)),
+        ]
+        if self.last_spawn is not None:
+            # Placed / asked for the last batch; orange when the area was full
+            placed, requested = self.last_spawn
+            labels.append((f"Terakhir: {placed}/{requested}", 200, y + 105, self.small_font,
+                           (200, 220, 255) if placed == requested else (255, 200, 100)))
+        
+        # Object counts
+        y = 245
+        labels += [
+            (f"🌳 Pohon: {frame.count('trees')}", 25, y, self.small_font, (150, 255, 150)),
+            (f"🏭 Pabrik: {frame.count('factories')}", 25, y + 30, self.small_font, (200, 200, 200)),
+            (f"🐄 Hewan: {frame.count('cows')}", 25, y + 60, self.small_font, (255, 230, 180)),
+            (f"🚗 Mobil: {frame.count('cars')}", 25, y + 90, self.small_font, (255, 235, 150)),
+            (f"Kualitas: {self.governor.settings['name']}", 200, y, self.small_font, (200, 220, 255)),
+        ]
+        
+        # Controls
+        y = self.screen_height - 165
+        labels += [
+            ("KONTROL:", 25, y, self.small_font, (255, 255, 150)),
+            ("T - Tambah Pohon (kurangi CO2) | B - Jumlah Tambah", 25, y + 30, self.small_font, (220, 220, 220)),
+            ("F - Tambah Pabrik | C - Tambah Hewan | V - Tambah Mobil", 25, y + 58, self.small_font, (220, 220, 220)),
+            ("SPACE - Pause | R - Reset | Mouse Drag - Rotate | M - Model", 25, y + 86, self.small_font, (220, 220, 220)),
+            ("A - Toggle Auto-Rotate | P - Profiler | O - Simpan Profil", 25, y + 114, self.small_font, (220, 220, 220)),
+            ("1/2/3/4 - Kecepatan 1x/10x/100x/Maks | S/L - Simpan/Muat", 25, y + 142, self.small_font, (220, 220, 220)),
+        ]
+        return tuple(labels)
+    
+    def build_hud(self, labels):
+        # Compile backgrounds and text quads into one display list
+        if self.hud_list is None:
+            self.hud_list = glGenLists(1)
+        # The list binds these textures by name, so they must outlive it in the cache;
+        # new ones are uploaded before compiling so the list never records the upload
+        text_cache.pin((text, font, color) for text, _, _, font, color in labels)
+        for text, _, _, font, color in labels:
+            text_cache.get(text, font, color)
+        glNewList(self.hud_list, GL_COMPILE)
+        
+        # Dark overlay for title
+        glColor4f(0.0, 0.0, 0.0, 0.5)
+        glBegin(GL_QUADS)
+        glVertex2f(0, 0)
+        glVertex2f(self.screen_width, 0)
+        glVertex2f(self.screen_width, 70)
+        glVertex2f(0, 70)
+        glEnd()
+        
+        # Stats background
+        glColor4f(0.0, 0.0, 0.0, 0.4)
+        glBegin(GL_QUADS)
+        glVertex2f(10, 75)
+        glVertex2f(350, 75)
+        glVertex2f(350, 330)
+        glVertex2f(10, 330)
+        glEnd()
+        
+        # Controls background
+        glBegin(GL_QUADS)
+        glVertex2f(10, self.screen_height - 180)
+        glVertex2f(520, self.screen_height - 180)
+        glVertex2f(520, self.screen_height - 10)
+        glVertex2f(10, self.screen_height - 180)
+        glEnd()
+        
+        for text, x, y, font, color in labels:
+            text_cache.draw(text, x, y, font, color)
+        
+        glEndList()
+    
+    def draw_ui(self):
+        # The HUD is only recompiled when a label or the window size changes
+        labels = self.hud_labels()
+        key = (self.screen_width, self.screen_height, labels)
+        if key != self.hud_key:
+            self.build_hud(labels)
+            self.hud_key = key
+        
+        glDisable(GL_LIGHTING)
+        glDisable(GL_DEPTH_TEST)
+        
+        glMatrixMode(GL_PROJECTION)
+        glPushMatrix()
+        glLoadIdentity()
+        glOrtho(0, self.screen_width, self.screen_height, 0, -1, 1)
+        glMatrixMode(GL_MODELVIEW)
+        glPushMatrix()
+        glLoadIdentity()
+        
+        glCallList(self.hud_list)
+        profiler.draw_calls += 1
+        
+        glPopMatrix()
+        glMatrixMode(GL_PROJECTION)
+        glPopMatrix()
+        glMatrixMode(GL_MODELVIEW)
+        
+        glEnable(GL_DEPTH_TEST)
+        glEnable(GL_LIGHTING)
+    
+    def draw_profiler(self):
+        # Rolling frame-time graph and per-phase breakdown, top right
+        history = profiler.history()[-240:, -1]
+        left, top, width, height = self.screen_width - 380, 80, 360, 120
+        scale = height / 33.3  # full height = two 60 FPS frames
+        
+        if profiler.frames % 15 == 1 or not self.profiler_labels:
+            averages = profiler.averages()
+            lines = [f"{name}: {averages[i]:.2f} ms" for i, name in enumerate(FrameProfiler.PHASES)]
+            lines.append(f"frame: {averages[-1]:.2f} ms | draw calls: {profiler.last_draw_calls}"
+                         f" | culled: {frustum.culled}")
+            lines.append(f"renderer: {'shader' if shader_renderer.enabled else 'legacy'}")
+            lines.append(f"CO2: {len(self.frame.co2_pos)} | asap: {self.frame.smoke} | knalpot: {self.frame.exhaust}")
+            if self.sim_thread is not None:
+                lines.append(f"sim thread: {self.sim_thread.tick_ms:.2f} ms/tick | terlambat: {self.sim_thread.late_ticks}")
+            self.profiler_labels = lines
+        
+        glDisable(GL_LIGHTING)
+        glDisable(GL_DEPTH_TEST)
+        glMatrixMode(GL_PROJECTION)
+        glPushMatrix()
+        glLoadIdentity()
+        glOrtho(0, self.screen_width, self.screen_height, 0, -1, 1)
+        glMatrixMode(GL_MODELVIEW)
+        glPushMatrix()
+        glLoadIdentity()
+        
+        glColor4f(0.0, 0.0, 0.0, 0.55)
+        glBegin(GL_QUADS)
+        glVertex2f(left - 10, top - 10)
+        glVertex2f(left + width + 10, top - 10)
+        glVertex2f(left + width + 10, top + height + 30 + 22 * len(self.profiler_labels))
+        glVertex2f(left - 10, top + height + 30 + 22 * len(self.profiler_labels))
+        glEnd()
+        
+        # 16.7 ms budget line
+        glColor4f(1.0, 0.4, 0.4, 0.8)
+        glBegin(GL_LINES)
+        glVertex2f(left, top + height - 16.7 * scale)
+        glVertex2f(left + width, top + height - 16.7 * scale)
+        glEnd()
+        
+        if len(history) > 1:
+            xs = left + np.arange(len(history)) * (width / 239.0)
+            ys = top + height - np.minimum(history, 33.3) * scale
+            glColor4f(0.4, 1.0, 0.5, 1.0)
+            glEnableClientState(GL_VERTEX_ARRAY)
+            glVertexPointer(2, GL_FLOAT, 0, np.ascontiguousarray(np.column_stack([xs, ys]), dtype=np.float32))
+            glDrawArrays(GL_LINE_STRIP, 0, len(history))
+            glDisableClientState(GL_VERTEX_ARRAY)
+        
+        for i, line in enumerate(self.profiler_labels):
+            text_cache.draw(line, left, top + height + 30 + 22 * i, self.small_font, (230, 230, 230))
+        
+        glPopMatrix()
+        glMatrixMode(GL_PROJECTION)
+        glPopMatrix()
+        glMatrixMode(GL_MODELVIEW)
+        glEnable(GL_DEPTH_TEST)
+        glEnable(GL_LIGHTING)
+    
+    def handle_events(self):
+        for event in pygame.event.get():
+            if self.input_log is not None and event.type in RECORDED_EVENTS and \
+                    (event.type != pygame.MOUSEMOTION or self.mouse_down):
+                self.input_log.add_event(event, self.core.time)
+            self.handle_event(event)
+    
+    def handle_event(self, event):
+        if event.type == pygame.QUIT:
+            self.running = False
+            
+        elif event.type == pygame.VIDEORESIZE:
+            self.screen_width = event.w
+            self.screen_height = event.h
+            if self.headless:
+                return
+            if pygame.version.vernum[0] < 2:
+                # pygame 1 recreates the GL context on set_mode
+                self.display = pygame.display.set_mode((event.w, event.h), DOUBLEBUF | OPENGL | RESIZABLE)
+                self.setup_opengl()
+            glViewport(0, 0, event.w, event.h)
+            glMatrixMode(GL_PROJECTION)
+            glLoadIdentity()
+            gluPerspective(FOV_Y, event.w / event.h, 0.1, 50.0)
+            glMatrixMode(GL_MODELVIEW)
+            
+        elif event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_SPACE:
+                self.paused = not self.paused
+            elif event.key == pygame.K_r:
+                self.reset_scene()
+            elif event.key in self.spawn_keys:
+                obj_type, batch = self.spawn_keys[event.key], self.spawn_batch
+                if batch == 1:
+                    self.apply(lambda core: core.add_object(obj_type))
+                else:
+                    self.apply(lambda core: self.spawn_batch_objects(core, obj_type, batch))
+            elif event.key == pygame.K_b:
+                self.spawn_batch = SPAWN_BATCHES[(SPAWN_BATCHES.index(self.spawn_batch) + 1) % len(SPAWN_BATCHES)]
+            elif event.key == pygame.K_a:
+                self.auto_rotate = not self.auto_rotate
+            elif event.key == pygame.K_p:
+                profiler.enabled = not profiler.enabled
+            elif event.key == pygame.K_o:
+                path = profiler.dump(time.strftime("profile_%Y%m%d_%H%M%S.csv"))
+                print(f"Profil disimpan ke {path}")
+            elif event.key == pygame.K_s:
+                self.save_snapshot(time.strftime("snapshot_%Y%m%d_%H%M%S.npz"))
+            elif event.key == pygame.K_l and self.last_snapshot:
+                self.load_snapshot(self.last_snapshot)
+            elif event.key == pygame.K_m:
+                self.apply(lambda core: core.set_carbon_model(
+                    CARBON_MODELS[(CARBON_MODELS.index(core.carbon_model) + 1) % len(CARBON_MODELS)]))
+            elif event.key in (pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4):
+                self.time_scale = TIME_SCALES[event.key - pygame.K_1]
+            elif event.key == pygame.K_ESCAPE:
+                self.running = False
+                
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            self.mouse_down = True
+            self.last_mouse_pos = event.pos
+            self.auto_rotate = False
+            
+        elif event.type == pygame.MOUSEBUTTONUP:
+            self.mouse_down = False
+            
+        elif event.type == pygame.MOUSEMOTION:
+            if self.mouse_down and self.last_mouse_pos:
+                x, y = event.pos
+                dx = x - self.last_mouse_pos[0]
+                dy = y - self.last_mouse_pos[1]
+                
+                self.rotation_y += dx * 0.4
+                self.rotation_x += dy * 0.4
+                self.rotation_x = max(-90, min(90, self.rotation_x))
+                
+                self.last_mouse_pos = (x, y)
+    
+    def run(self):
+        if self.threaded and self.input_log is None:
+            # A recorded session needs the step count of every frame, so it stays serial
+            self.sim_thread = SimulationThread(self.core)
+            self.sim_thread.start()
+        while self.running:
+            # Clamp long stalls (window drags, breakpoints) to a quarter second
+            dt = min(self.clock.tick(1000.0 / self.governor.budget_ms) / 1000.0, 0.25)
+            work_start = time.perf_counter()
+            
+            profiler.begin_frame()
+            self.handle_events()
+            profiler.lap('events')
+            steps = self.update(dt)
+            if self.input_log is not None:
+                self.input_log.add_frame(dt, steps, self.core)
+            profiler.lap('update')
+            self.render_frame()
+            pygame.display.flip()
+            profiler.lap('present')
+            profiler.end_frame()
+            if self.governor.add((time.perf_counter() - work_start) * 1000):
+                self.apply_quality()
+        
+        if self.sim_thread is not None:
+            self.sim_thread.stop()
+            self.sim_thread = None
+        if self.input_log is not None:
+            print(f"Input ({len(self.input_log.frames)} frame) disimpan ke {self.input_log.save()}")
+        pygame.quit()
+    
+    def replay(self, log):
+        # Feed a recorded session back frame by frame with the recorded step counts,
+        # without a clock; rendering happens only if this viewer has a window
+        frame_ms = np.zeros(len(log.frames))
+        diverged = None
+        start = time.perf_counter()
+        for frame, (dt, steps, accumulator, sim_time, co2_level) in enumerate(log.frames):
+            frame_start = time.perf_counter()
+            profiler.begin_frame()
+            for event in log.frame_events(frame):
+                if event.type == pygame.KEYDOWN and event.key in REPLAY_SKIPPED_KEYS:
+                    continue
+                self.handle_event(event)
+            profiler.lap('events')
+            self.update(dt, int(steps))
+            self.core.accumulator = accumulator
+            profiler.lap('update')
+            if not self.headless:
+                self.render_frame()
+                pygame.display.flip()
+                profiler.lap('present')
+            profiler.end_frame()
+            frame_ms[frame] = (time.perf_counter() - frame_start) * 1000
+            if diverged is None and (self.core.time != sim_time or self.core.co2_level != co2_level):
+                diverged = frame
+        elapsed = time.perf_counter() - start
+        
+        print(f"Replay {len(log.frames)} frame ({self.core.time:.1f} s simulasi) dalam {elapsed:.2f} s")
+        if len(frame_ms):
+            print(f"  frame ms: rata-rata {frame_ms.mean():.2f} | p95 {np.percentile(frame_ms, 95):.2f} "
+                  f"| maks {frame_ms.max():.2f}")
+        print("  state cocok dengan rekaman" if diverged is None else f"  state menyimpang mulai frame {diverged}")
+        return frame_ms
+    
+    def record(self, recorder, frames, fps=FPS):
+        # Fixed sim time per frame, rendered as fast as the GPU allows (no clock, no flip)
+        recorder.setup()
+        dt = 1.0 / fps
+        start = time.perf_counter()
+        for _ in range(frames):
+            self.core.advance(dt)
+            if self.auto_rotate:
+                self.rotation_y += 12 * dt
+            recorder.begin()
+            self.render_frame()
+            recorder.end()
+        recorder.finish()
+        elapsed = time.perf_counter() - start
+        print(f"{frames} frame ({recorder.width}x{recorder.height}) ditulis ke {recorder.out} "
+              f"dalam {elapsed:.2f} s ({frames / elapsed:.1f} fps)", file=sys.stderr)
+
+# Main entry point
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulasi 3D Siklus Karbon")
+    parser.add_argument("--headless", action="store_true", help="step the simulation without pygame/OpenGL")
+    parser.add_argument("--steps", type=int, default=FPS * 60, help="number of headless steps")
+    parser.add_argument("--dt", type=float, default=SIM_DT, help="headless step size in seconds (up to ~0.5 keeps emission and absorption rates)")
+    parser.add_argument("--seed", type=int, default=None, help="random seed (same seed, same run)")
+    parser.add_argument("--sweep", metavar="OUT_DIR", help="run a scenario grid headless and write results here")
+    parser.add_argument("--snapshot", metavar="PATH", help="start from a saved .npz snapshot (viewer, headless, sweep, record)")
+    parser.add_argument("--trees", default=None,
+                        help="sweep/project: tree counts, e.g. 0,10,50 (default 3, or 0 extra with --snapshot)")
+    parser.add_argument("--factories", default=None, help="sweep/project: factory counts")
+    parser.add_argument("--cows", default=None, help="sweep/project: cow counts")
+    parser.add_argument("--cars", default=None, help="sweep/project: car counts")
+    parser.add_argument("--seeds", default="0", help="sweep: seeds, e.g. 0-9")
+    parser.add_argument("--duration", type=float, default=60.0, help="sweep: simulated seconds per run")
+    parser.add_argument("--sample-interval", type=float, default=1.0, help="sweep: seconds between samples")
+    parser.add_argument("--spawn", type=parse_spawn, default=None,
+                        help="add objects in bulk at start, e.g. tree=5000,factory=500 (viewer, headless, record; "
+                             "a replay takes it from the input log)")
+    parser.add_argument("--layout", choices=LAYOUTS, default='grid', help="spawn: placement layout")
+    parser.add_argument("--spawn-radius", type=float, default=BULK_RADIUS, help="spawn: outer radius for grid/poisson")
+    parser.add_argument("--min-distance", type=float, default=None,
+                        help="spawn: minimum spacing to every other object (default: none, poisson %s)" % BULK_MIN_DISTANCE)
+    parser.add_argument("--carbon-model", choices=CARBON_MODELS, default=None,
+                        help="particles (default) or reservoir: CarbonBudget drives CO2, particle sim off "
+                             "(a replay takes it from the input log)")
+    parser.add_argument("--project", type=float, metavar="YEARS",
+                        help="integrate the reservoir model for YEARS over the --trees/--factories/... grid")
+    parser.add_argument("--project-out", default="projection", help="project: output directory")
+    parser.add_argument("--project-samples", type=int, default=100, help="project: samples over the whole run")
+    parser.add_argument("--workers", type=int, default=None, help="sweep: worker processes (default: all cores)")
+    parser.add_argument("--single-thread", action="store_true",
+                        help="step the simulation in the render loop instead of on its own thread")
+    parser.add_argument("--quality", choices=QUALITY_MODES, default='auto',
+                        help="render quality tier, or auto to adapt it to --frame-budget")
+    parser.add_argument("--frame-budget", type=float, default=FRAME_BUDGET_MS,
+                        help="target frame time in ms for --quality auto (also caps the frame rate)")
+    parser.add_argument("--renderer", choices=RENDERERS, default='legacy',
+                        help="legacy fixed-function GL or shader (GLSL + VBO, needs GL 3.3)")
+    parser.add_argument("--record-input", metavar="LOG", help="record handled input events and step counts to LOG (.npz)")
+    parser.add_argument("--replay", metavar="LOG", help="replay a recorded input log as fast as possible")
+    parser.add_argument("--replay-render", action="store_true", help="replay: also render every frame in a window")
+    parser.add_argument("--record", metavar="OUT",
+                        help="render offscreen to OUT: a directory (PNG sequence), a .raw file or - (raw RGB24 on stdout)")
+    parser.add_argument("--record-size", default="1920x1080", help="record: frame size WIDTHxHEIGHT")
+    parser.add_argument("--record-frames", type=int, default=FPS * 10, help="record: number of frames")
+    parser.add_argument("--record-fps", type=int, default=FPS, help="record: frames per simulated second")
+    args = parser.parse_args()
+    layout = dict(layout=args.layout, radius=args.spawn_radius, min_distance=args.min_distance)
+    options = dict(carbon_model=args.carbon_model, spawn=args.spawn, layout=layout)
+    
+    if args.project:
+        counts = [parse_values(value or "3") for value in (args.trees, args.factories, args.cows, args.cars)]
+        run_projection(scenario_grid(*counts, duration=args.project), args.project, args.project_out,
+                       args.project_samples)
+    elif args.sweep:
+        default_count = "0" if args.snapshot else "3"
+        counts = [parse_values(value or default_count) for value in (args.trees, args.factories, args.cows, args.cars)]
+        scenarios = scenario_grid(*counts, parse_values(args.seeds), args.duration)
+        run_sweep(scenarios, args.sweep, args.workers, args.sample_interval, args.snapshot)
+    elif args.headless:
+        run_headless(args.steps, args.dt, args.seed, args.snapshot, args.spawn, layout, args.carbon_model)
+    elif args.replay:
+        log = InputLog.load(args.replay)
+        sim = CarbonCycleSimulation(log.seed, args.renderer, headless=not args.replay_render,
+                                    quality=args.quality)
+        if log.snapshot:
+            sim.load_snapshot(log.snapshot)
+        # Logs from before options were recorded still take them from the command line
+        apply_run_options(sim.core, **(options if log.options is None else log.options))
+        sim.replay(log)
+        if args.replay_render:
+            pygame.quit()
+    elif args.record:
+        # e.g. python Final.py --record - | ffmpeg -f rawvideo -pix_fmt rgb24 -s 1920x1080 -r 60 -i - out.mp4
+        size = tuple(int(v) for v in args.record_size.lower().split('x'))
+        sim = CarbonCycleSimulation(args.seed, args.renderer, offscreen_size=size, quality=args.quality)
+        if args.snapshot:
+            sim.load_snapshot(args.snapshot)
+        apply_run_options(sim.core, **options)
+        sim.record(FrameRecorder(*size, args.record), args.record_frames, args.record_fps)
+        pygame.quit()
+    else:
+        seed = args.seed
+        if args.record_input and seed is None:
+            # A replay needs the seed, so pick one instead of OS entropy
+            seed = int(np.random.SeedSequence().entropy % 2**32)
+        sim = CarbonCycleSimulation(seed, args.renderer, threaded=not args.single_thread,
+                                   quality=args.quality, frame_budget=args.frame_budget)
+        if args.snapshot:
+            sim.load_snapshot(args.snapshot)
+        apply_run_options(sim.core, **options)
+        if args.record_input:
+            sim.input_log = InputLog(args.record_input, seed, args.snapshot, options)
+        sim.run()
\ No newline at end of file
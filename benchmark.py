@@ -0,0 +1,223 @@
+# Benchmark update() dan draw() pada berbagai ukuran scene
+#
+#   python benchmark.py --save bench.json
+#   python benchmark.py --compare bench.json --threshold 0.25
+#
+# update() is timed per phase on a headless SimulationCore. draw() runs
+# against a mocked GL module that only counts calls, so it works without a
+# display or GPU and measures the Python-side cost of each frame.
+import argparse
+import json
+import math
+import platform
+import sys
+import time
+
+import numpy as np
+
+import Final
+
+ENTITY_COUNTS = [10, 100, 1000]
+PARTICLE_COUNTS = [1000, 10000, 100000]
+UPDATE_PHASES = [
+    ('entity_updates', lambda core, dt: core.update_entities(dt)),
+    ('particle_update', lambda core, dt: core.update_particles(dt)),
+    ('emission_spawns', lambda core, dt: core.spawn_emissions(dt)),
+    ('tree_absorption', lambda core, dt: core.absorb_co2()),
+    ('rate_computation', lambda core, dt: core.update_rates(dt)),
+]
+DRAW_CALLS = ('glDrawArrays', 'glDrawElements', 'glCallList', 'glBegin', 'glDrawPixels')
+
+
+def build_scene(entities, particles, seed=0):
+    core = Final.SimulationCore(seed, {obj_type: entities for obj_type in Final.OBJECT_TYPES})
+    core.co2_particles.clear()
+    positions = core.rng.uniform((-6, -2, -6), (6, 4, 6), (particles, 3))
+    core.co2_particles.spawn(positions, core.rng)
+    # Warm up a few steps so smoke, exhaust and timers are in a steady state
+    for _ in range(30):
+        core.step(Final.SIM_DT)
+    return core
+
+
+def time_update(core, repeats):
+    # Every sample starts from the same warmed-up state; otherwise later samples
+    # see a scene the earlier ones already changed (e.g. fewer particles to absorb)
+    state = core.snapshot()
+    timings = {}
+    for name, phase in UPDATE_PHASES:
+        samples = []
+        for _ in range(repeats):
+            core.restore(state)
+            start = time.perf_counter()
+            phase(core, Final.SIM_DT)
+            samples.append(time.perf_counter() - start)
+        timings[name] = float(np.median(samples) * 1000)
+    timings['total'] = sum(timings.values())
+    return timings
+
+
+def camera_matrices():
+    # The viewer's starting camera, in the column-major layout glGetFloatv returns,
+    # so frustum culling and LOD see the same scene the window would
+    f = 1 / math.tan(math.radians(Final.FOV_Y) / 2)
+    near, far = 0.1, 50.0
+    projection = np.array([
+        [f * Final.HEIGHT / Final.WIDTH, 0, 0, 0],
+        [0, f, 0, 0],
+        [0, 0, (far + near) / (near - far), 2 * far * near / (near - far)],
+        [0, 0, -1, 0],
+    ])
+    c, s = math.cos(math.radians(25)), math.sin(math.radians(25))
+    modelview = np.array([
+        [1, 0, 0, 0],
+        [0, c, -s, -1],
+        [0, s, c, -16],
+        [0, 0, 0, 1],
+    ])
+    return {Final.GL_MODELVIEW_MATRIX: modelview.T.astype(np.float32),
+            Final.GL_PROJECTION_MATRIX: projection.T.astype(np.float32)}
+
+
+# Class untuk GL palsu yang hanya menghitung pemanggilan
+class MockGL:
+    def __init__(self):
+        self.calls = {}
+        self.next_id = 1
+        self.saved = {}
+        self.matrices = {}
+
+    def _stub(self, name):
+        def call(*args, **kwargs):
+            self.calls[name] = self.calls.get(name, 0) + 1
+            if name in ('glGenLists', 'glGenTextures', 'glGenBuffers'):
+                self.next_id += 1
+                return self.next_id
+            if name == 'glGetFloatv':
+                return self.matrices.get(args[0], np.eye(4, dtype=np.float32))
+            return None
+        return call
+
+    def install(self):
+        self.matrices = camera_matrices()
+        for name, value in list(vars(Final).items()):
+            if name.startswith('gl') and callable(value):
+                self.saved[name] = value
+                setattr(Final, name, self._stub(name))
+
+    def uninstall(self):
+        for name, value in self.saved.items():
+            setattr(Final, name, value)
+        self.saved = {}
+
+    def reset(self):
+        self.calls = {}
+
+
+def make_viewer(core):
+    # A CarbonCycleSimulation without a window: only what render_frame needs
+    Final.pygame.font.init()
+    viewer = object.__new__(Final.CarbonCycleSimulation)
+    viewer.screen_width, viewer.screen_height = Final.WIDTH, Final.HEIGHT
+    viewer.font = Final.pygame.font.Font(None, 40)
+    viewer.small_font = Final.pygame.font.Font(None, 26)
+    viewer.renderer = 'legacy'
+    viewer.core = core
+    viewer.grass = Final.GrassField()
+    viewer.setup_opengl()
+    viewer.grass.build()
+    viewer.rotation_x, viewer.rotation_y = 25, 0
+    viewer.time_scale = Final.TIME_SCALES[0]
+    viewer.spawn_batch = Final.SPAWN_BATCHES[0]
+    viewer.last_spawn = None
+    viewer.sim_thread = None
+    viewer.governor = Final.QualityGovernor(adaptive=False)
+    return viewer
+
+
+def time_draw(core, repeats, gl):
+    viewer = make_viewer(core)
+    viewer.render_frame()  # first frame builds caches
+    gl.reset()
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        viewer.render_frame()
+        samples.append(time.perf_counter() - start)
+    calls = {name: count // repeats for name, count in gl.calls.items()}
+    return {
+        'ms': float(np.median(samples) * 1000),
+        'gl_calls': sum(calls.values()),
+        'draw_calls': sum(calls.get(name, 0) for name in DRAW_CALLS),
+    }
+
+
+def run(entity_counts, particle_counts, repeats, draw=True):
+    results = {'update': {}, 'draw': {}}
+    gl = MockGL()
+    for entities in entity_counts:
+        for particles in particle_counts:
+            key = f"entities={entities},particles={particles}"
+            core = build_scene(entities, particles)
+            results['update'][key] = time_update(core, repeats)
+            print(f"update {key}: {results['update'][key]['total']:.2f} ms")
+            if draw and Final.pygame is not None:
+                core = build_scene(entities, particles)
+                gl.install()
+                try:
+                    results['draw'][key] = time_draw(core, repeats, gl)
+                finally:
+                    gl.uninstall()
+                stats = results['draw'][key]
+                print(f"draw   {key}: {stats['ms']:.2f} ms, {stats['gl_calls']} GL calls, "
+                      f"{stats['draw_calls']} draw calls")
+    results['meta'] = {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'repeats': repeats,
+    }
+    return results
+
+
+def compare(current, baseline, threshold):
+    # Flag every timing or call count that grew more than threshold over baseline
+    regressions = []
+    for section in ('update', 'draw'):
+        for key, metrics in current.get(section, {}).items():
+            base = baseline.get(section, {}).get(key)
+            if base is None:
+                continue
+            for name, value in metrics.items():
+                old = base.get(name)
+                if old is None or old <= 0:
+                    continue
+                change = (value - old) / old
+                flag = 'REGRESSION' if change > threshold else 'ok'
+                if change > threshold:
+                    regressions.append((section, key, name))
+                print(f"{flag:>10}  {section} {key} {name}: {old:.3f} -> {value:.3f} ({change:+.0%})")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark update() dan draw()")
+    parser.add_argument("--entities", default=",".join(map(str, ENTITY_COUNTS)), help="entities per class, e.g. 10,100")
+    parser.add_argument("--particles", default=",".join(map(str, PARTICLE_COUNTS)), help="CO2 particle counts")
+    parser.add_argument("--repeats", type=int, default=10, help="samples per measurement (median is kept)")
+    parser.add_argument("--no-draw", action="store_true", help="skip the draw() benchmark")
+    parser.add_argument("--save", metavar="JSON", help="write results to this file")
+    parser.add_argument("--compare", metavar="JSON", help="compare against a stored baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown before flagging (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    results = run(Final.parse_values(args.entities), Final.parse_values(args.particles),
+                  args.repeats, draw=not args.no_draw)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
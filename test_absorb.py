@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+import Final
+
+
+def brute_force_absorb(core):
+    # Reference: every tree in row order takes the lowest-index live particle in range
+    particles = core.co2_particles
+    pos = particles.pos[:particles.count]
+    alive = np.ones(particles.count, dtype=bool)
+    absorbing = core.trees['absorbing'].copy()
+    co2_level = core.co2_level
+    for row, tree_pos in enumerate(core.trees['pos'].astype(np.float32)):
+        for i in range(len(pos)):
+            d = pos[i] - tree_pos
+            if alive[i] and np.dot(d, d) < Final.ABSORB_RADIUS * Final.ABSORB_RADIUS:
+                alive[i] = False
+                absorbing[row] = True
+                co2_level -= 0.5
+                break
+    return absorbing, pos[alive].copy(), co2_level
+
+
+def random_scene(seed, trees, particles, spread):
+    rng = np.random.default_rng(seed)
+    core = Final.SimulationCore(seed=seed, counts={'tree': trees})
+    core.co2_particles.count = 0
+    # Clump particles around the trees so many of them are contested
+    centers = core.trees['pos'][rng.integers(0, len(core.trees), particles)]
+    core.co2_particles.spawn(centers + rng.normal(0, spread, (particles, 3)), rng)
+    return core
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_absorb_matches_brute_force(seed):
+    rng = np.random.default_rng(1000 + seed)
+    core = random_scene(seed, int(rng.integers(1, 60)), int(rng.integers(0, 400)), rng.uniform(0.2, 2.0))
+    absorbing, survivors, co2_level = brute_force_absorb(core)
+
+    core.absorb_co2()
+
+    assert np.array_equal(core.trees['absorbing'], absorbing)
+    assert core.co2_particles.count == len(survivors)
+    assert np.array_equal(core.co2_particles.pos[:core.co2_particles.count], survivors)
+    assert core.co2_level == pytest.approx(co2_level)
+
+
+def test_absorb_without_particles():
+    core = random_scene(0, 10, 0, 1.0)
+    co2_level = core.co2_level
+
+    core.absorb_co2()
+
+    assert not core.trees['absorbing'].any()
+    assert core.co2_level == co2_level
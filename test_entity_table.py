@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+import Final
+
+
+def numbered_table(count):
+    # Tree table whose 'pos' x column records the order each row was added in
+    table = Final.EntityTable(Final.Tree.COMPONENTS)
+    pos = np.zeros((count, 3))
+    pos[:, 0] = np.arange(count)
+    handles = table.add(count, pos=pos)
+    return table, handles
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_remove_keeps_surviving_handles(seed):
+    rng = np.random.default_rng(seed)
+    count = int(rng.integers(1, 200))
+    table, handles = numbered_table(count)
+    removed = rng.choice(handles, int(rng.integers(0, count + 1)), replace=False)
+    survivors = np.setdiff1d(handles, removed)
+
+    table.remove(removed)
+
+    assert len(table) == len(survivors)
+    for handle in survivors:
+        assert table['pos'][table.row(handle), 0] == handle
+    for handle in removed:
+        with pytest.raises(KeyError):
+            table.row(handle)
+    # Survivors stay packed in their original order
+    assert np.array_equal(table['handle'], survivors)
+
+
+def test_remove_then_add_never_reuses_handles():
+    table, handles = numbered_table(10)
+    table.remove(handles[[2, 5, 7]])
+
+    added = table.add(3, pos=(50.0, 0.0, 0.0))
+
+    assert not np.isin(added, handles).any()
+    assert np.array_equal(table['handle'], np.concatenate([np.delete(handles, [2, 5, 7]), added]))
+    for handle in added:
+        assert table['pos'][table.row(handle), 0] == 50.0
+    with pytest.raises(KeyError):
+        table.row(handles[5])
+
+
+def test_restore_keeps_handles_after_remove():
+    table, handles = numbered_table(8)
+    table.remove(handles[[0, 3]])
+    state = table.state()
+
+    copy = Final.EntityTable(Final.Tree.COMPONENTS)
+    copy.restore(state)
+
+    for handle in np.delete(handles, [0, 3]):
+        assert copy['pos'][copy.row(handle), 0] == handle
+    with pytest.raises(KeyError):
+        copy.row(handles[3])
+    assert np.array_equal(copy.add(1), [8])